@@ -1,9 +1,33 @@
 import os
 import sys
 import locale
+import multiprocessing
 import traceback
+import contextlib
 from typing import Optional
 
+class _DisabledProfiler:
+    """Заменяет профилировщик запуска, если его не удалось загрузить"""
+    enabled = False
+
+    def phase(self, name):
+        return contextlib.nullcontext()
+
+    def mark(self, name):
+        pass
+
+    def write_report(self, path=None):
+        return None
+
+# Профилировщик запуска подключается первым, чтобы учесть время всех последующих импортов.
+# Он необязателен: ошибка в нем не должна мешать запуску приложения
+try:
+    from utils.startup_profiler import StartupProfiler
+    profiler = StartupProfiler()
+except Exception:
+    print(f"Профилировщик запуска недоступен:\n{traceback.format_exc()}")
+    profiler = _DisabledProfiler()
+
 # Устанавливаем переменную окружения PYTHONIOENCODING на utf-8
 os.environ["PYTHONIOENCODING"] = "utf-8"
 
@@ -34,7 +58,8 @@ if sys.platform == 'win32':
 
 # Импорт обработчика ошибок запуска
 try:
-    from utils.startup_error_handler import StartupErrorHandler
+    with profiler.phase("import StartupErrorHandler"):
+        from utils.startup_error_handler import StartupErrorHandler
 except ImportError:
     def show_error(title: str, message: str) -> None:
         print(f"{title}: {message}")
@@ -55,14 +80,22 @@ except ImportError:
     sys.exit(1)
 
 # Объявляем logger в глобальной области
+from utils.settings import Settings
 from utils.logger import Logger
 logger = None
 
 def main():
     global logger  # Используем глобальную переменную logger
     try:
-        logger = Logger().get_logger()
+        # Явный порядок загрузки: сначала settings.json (один раз), затем логгер
+        # на основе уже готовых настроек. Этот же объект передается всем сервисам.
+        with profiler.phase("Settings"):
+            settings = Settings()
+        with profiler.phase("Logger"):
+            logger = Logger(settings).get_logger()
         logger.info("Запуск приложения TTStreamerPy")
+        if profiler.enabled:
+            logger.info("Профилирование запуска включено")
     except Exception as e:
         print(f"Ошибка при инициализации логгера: {str(e)}")
         try:
@@ -78,22 +111,29 @@ def main():
             pass
         sys.exit(1)
 
-    issues = StartupErrorHandler.check_environment()
+    with profiler.phase("Проверка окружения"):
+        issues = StartupErrorHandler.check_environment()
     if issues:
         error_message = StartupErrorHandler.format_error_message(issues)
         StartupErrorHandler.show_error_messagebox("Проблемы с зависимостями", error_message)
         sys.exit(1)
     
     try:
-        from PyQt6.QtWidgets import QApplication
-        from PyQt6.QtGui import QIcon
-        
-        from services.speech_service import SpeechService
-        from services.sound_service import SoundService
-        from services.gift_service import GiftService
-        from viewmodels.monitoring_viewmodel import MonitoringViewModel
-        from views.main_window import MainWindow
-        from utils.error_handler import ErrorHandler
+        with profiler.phase("Импорт модулей приложения"):
+            from PyQt6.QtWidgets import QApplication
+            from PyQt6.QtCore import QTimer
+            from PyQt6.QtGui import QIcon
+            
+            from services.speech_service import SpeechService
+            from services.sound_service import SoundService
+            from services.gift_service import GiftService
+            from services.history_service import HistoryService
+            from services.stats_service import StatsService
+            from services.trigger_service import TriggerService
+            from services.rule_engine import RuleEngine
+            from viewmodels.monitoring_viewmodel import MonitoringViewModel
+            from views.main_window import MainWindow
+            from utils.error_handler import ErrorHandler
         
         error_handler = ErrorHandler()
         
@@ -108,8 +148,9 @@ def main():
             logger.error(f"Ошибка при создании директории assets: {str(e)}", exc_info=True)
         
         try:
-            app = QApplication(sys.argv)
-            app.setApplicationName("TTStreamerPy")
+            with profiler.phase("QApplication"):
+                app = QApplication(sys.argv)
+                app.setApplicationName("TTStreamerPy")
             logger.debug("Создано приложение QApplication")
         except Exception as e:
             error_handler.show_error_dialog(None, "Критическая ошибка", 
@@ -120,17 +161,42 @@ def main():
         
         try:
             logger.debug("Инициализация сервисов")
-            speech_service = SpeechService()
-            sound_service = SoundService()
-            gift_service = GiftService()
+            with profiler.phase("SpeechService"):
+                speech_service = SpeechService(settings)
+            with profiler.phase("SoundService"):
+                sound_service = SoundService(settings)
+            with profiler.phase("GiftService"):
+                gift_service = GiftService(settings)
+            stats_service = StatsService(settings)
+            with profiler.phase("TriggerService"):
+                trigger_service = TriggerService(settings)
+            with profiler.phase("RuleEngine"):
+                rule_engine = RuleEngine(settings, trigger_service)
+            history_service = None
+            if settings.history_enabled:
+                with profiler.phase("HistoryService"):
+                    history_service = HistoryService(settings)
             
             logger.debug("Инициализация ViewModel")
-            monitoring_viewmodel = MonitoringViewModel(speech_service, sound_service, gift_service)
+            with profiler.phase("MonitoringViewModel"):
+                monitoring_viewmodel = MonitoringViewModel(speech_service, sound_service, gift_service, settings,
+                                                           history_service, stats_service, rule_engine)
             
             logger.debug("Создание главного окна")
-            main_window = MainWindow(monitoring_viewmodel)
-            main_window.show()
+            with profiler.phase("MainWindow"):
+                main_window = MainWindow(monitoring_viewmodel)
+                main_window.show()
             logger.info("Приложение запущено")
+            StartupErrorHandler.mark_startup_successful()
+            
+            if profiler.enabled:
+                # Таймер с нулевой задержкой срабатывает после первой отрисовки окна в цикле событий
+                def on_first_paint():
+                    profiler.mark("Первая отрисовка окна")
+                    report_path = profiler.write_report()
+                    if report_path:
+                        logger.info(f"Профиль запуска сохранен в {report_path}")
+                QTimer.singleShot(0, on_first_paint)
             
             sys.exit(app.exec())
         except Exception as e:
@@ -148,6 +214,8 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Нужен для дочернего процесса синтеза речи в собранном приложении
+    multiprocessing.freeze_support()
     try:
         main()
     except Exception as e:
@@ -8,6 +8,13 @@ class AlertLevel(IntEnum):
     NORMAL = 0
     IMPORTANT = 1
 
+class EventType(IntEnum):
+    SYSTEM = 0
+    COMMENT = 1
+    LIKE = 2
+    GIFT = 3
+    JOIN = 4
+
 @dataclass
 class TableItemView:
     timestamp: datetime
@@ -16,6 +23,13 @@ class TableItemView:
     alert_level: AlertLevel = AlertLevel.NORMAL
     gift_name: str = ""  # Название подарка
     gift_image: str = ""  # base64-encoded изображение подарка
+    seq: int = 0  # Порядковый номер события в сессии мониторинга
+    event_type: EventType = EventType.SYSTEM  # Тип события TikTok
+    user_id: str = ""  # Уникальный ID пользователя TikTok (@unique_id)
+    gift_id: int = 0  # ID подарка TikTok (для привязки звука)
+    gift_count: int = 0  # Количество подарков в серии
+    diamond_count: int = 0  # Стоимость одного подарка в алмазах
+    repeat_count: int = 0  # Сколько событий объединено в строке правилом aggregate
     
     def __post_init__(self):
         self.logger = Logger().get_logger('TableItemView')
@@ -29,4 +43,13 @@ class GiftData:
     
     def __post_init__(self):
         self.logger = Logger().get_logger('GiftData')
-        self.logger.debug(f"Создан объект GiftData: ID {self.id}, имя: {self.name}, изображение: {self.image[:20]}...")
\ No newline at end of file
+        self.logger.debug(f"Создан объект GiftData: ID {self.id}, имя: {self.name}, изображение: {self.image[:20]}...")
+
+@dataclass
+class UserStats:
+    user_id: str
+    nickname: str
+    gift_count: int = 0  # Количество подарков с учетом серий
+    diamonds: int = 0  # Суммарная стоимость подарков в алмазах
+    likes: int = 0
+    comments: int = 0
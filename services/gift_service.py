@@ -4,32 +4,70 @@ import base64
 import aiohttp
 import asyncio
 import aiofiles
+import threading
+import time
+from urllib.parse import urlsplit
 from utils.logger import Logger
+from utils.circuit_breaker import CircuitBreaker
 from utils.error_handler import ErrorHandler
+from utils.settings import Settings
+from utils.image_utils import make_thumbnail
 from models.data_models import GiftData
 
 class GiftService:
     _instance = None
+    # Сколько изображений подарков загружается одновременно
+    DOWNLOAD_CONCURRENCY = 4
+    # Таймаут загрузки одного изображения (с)
+    DOWNLOAD_TIMEOUT = 15
+    # Сколько загрузок может занять предзагрузка каталога: остальные соединения остаются
+    # свободными для подарков, пришедших во время предзагрузки
+    PREFETCH_CONCURRENCY = 2
+    # Размер миниатюры подарка в кэше (совпадает с размером значка в таблице событий)
+    THUMBNAIL_SIZE = 32
+    # Папка для исходных изображений, если включено их сохранение
+    ORIGINALS_DIR = "gift_images"
+    # Сколько секунд не повторять загрузку подарка после ошибки
+    FAILURE_TTL = 300
+    # После скольких ошибок подряд запросы к хосту приостанавливаются и на сколько секунд
+    BREAKER_THRESHOLD = 5
+    BREAKER_RESET_TIMEOUT = 60
+    # Задержка сохранения кэша после загрузки, чтобы объединить несколько загрузок в одну запись (с)
+    SAVE_DELAY = 2.0
     
-    def __new__(cls):
+    def __new__(cls, settings=None):
         if cls._instance is None:
             cls._instance = super(GiftService, cls).__new__(cls)
-            cls._instance._initialize()
+            cls._instance._initialize(settings or Settings())
         return cls._instance
     
-    def _initialize(self):
+    def _initialize(self, settings):
         """
         Инициализация сервиса подарков
         """
+        self.settings = settings
         self.logger = Logger().get_logger('GiftService')
         self.error_handler = ErrorHandler()
         self.logger.info("Инициализация сервиса подарков")
         
         self.gift_dict = {}
         self.gift_file = "gifts.json"
+        self.lock = threading.Lock()
+        # Фоновые загрузки выполняются в отдельном цикле asyncio с общим пулом соединений
+        self._loop = None
+        self._session = None
+        self._save_handle = None
+        self._pending = {}  # ID подарка -> обработчики, ожидающие загрузки
+        self._failed = {}  # ID подарка -> время, до которого загрузку не повторять
+        self._breakers = {}  # хост -> CircuitBreaker
         
         # Загружаем данные из файла при инициализации
         asyncio.run(self._load_from_file())
+        # Записи, сохраненные до появления миниатюр, приводятся к ним в фоне
+        if any(data.get('size') != self.THUMBNAIL_SIZE for data in self.gift_dict.values()):
+            with self.lock:
+                loop = self._ensure_loop()
+            asyncio.run_coroutine_threadsafe(self._normalize_cached(), loop)
     
     async def _load_from_file(self):
         """
@@ -52,9 +90,12 @@ class GiftService:
         Сохраняет данные о подарках в файл
         """
         try:
+            # Снимок словаря: фоновые загрузки могут дополнять его во время записи
+            with self.lock:
+                gift_dict = dict(self.gift_dict)
             async with aiofiles.open(self.gift_file, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(self.gift_dict, ensure_ascii=False, indent=2))
-            self.logger.info(f"Сохранено {len(self.gift_dict)} записей о подарках в файл")
+                await f.write(json.dumps(gift_dict, ensure_ascii=False, indent=2))
+            self.logger.info(f"Сохранено {len(gift_dict)} записей о подарках в файл")
         except Exception as e:
             self.logger.error(f"Ошибка при сохранении данных о подарках: {str(e)}", exc_info=True)
             self.error_handler.handle_file_error(None, e, self.gift_file)
@@ -66,9 +107,9 @@ class GiftService:
         try:
             gift_id_str = str(gift_id)
             
-            if gift_id_str in self.gift_dict:
-                data = self.gift_dict[gift_id_str]
-                self.logger.debug(f"Получены данные подарка ID {gift_id}: {data}")
+            data = self.gift_dict.get(gift_id_str)
+            if data is not None:
+                self.logger.debug(f"Получены данные подарка ID {gift_id}: {data['name']}")
                 return GiftData(id=gift_id, name=data['name'], image=data['image'])
             
             self.logger.debug(f"Данные подарка ID {gift_id} не найдены")
@@ -83,6 +124,9 @@ class GiftService:
         """
         try:
             self.logger.debug(f"Запуск создания данных подарка ID {gift_id}, имя: {name}, URL: {url}")
+            with self.lock:
+                if self._is_blocked(str(gift_id), url):
+                    return None
             # Используем aiohttp для асинхронного запроса
             async with aiohttp.ClientSession() as session:
                 try:
@@ -91,34 +135,262 @@ class GiftService:
                         if response.status != 200:
                             error_msg = f"Ошибка при загрузке изображения подарка: HTTP {response.status}"
                             self.logger.error(error_msg)
+                            self._record_failure(str(gift_id), url, response.status >= 500)
                             return None
                         
                         content = await response.read()
-                        image_data = base64.b64encode(content).decode('utf-8')
-                        
-                        gift_data = {
-                            'name': name,
-                            'image': image_data
-                        }
-                        
-                        self.gift_dict[str(gift_id)] = gift_data
-                        self.logger.debug(f"Данные подарка ID {gift_id} добавлены в словарь: {gift_data}")
+                        self._record_success(url)
+                        image_data = self._ingest(gift_id, name, content)
+                        self.logger.debug(f"Данные подарка ID {gift_id} добавлены в словарь")
                         
                         # Сохраняем в файл асинхронно
                         await self._save_to_file()
                         self.logger.info(f"Подарок ID {gift_id} успешно создан и сохранен")
                         
                         return GiftData(id=gift_id, name=name, image=image_data)
-                except aiohttp.ClientError as e:
-                    self.logger.error(f"Ошибка сети при создании данных подарка: {str(e)}")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # Таймаут не наследует ClientError, но это такая же ошибка хоста
+                    self.logger.error(f"Ошибка сети при создании данных подарка: {str(e) or type(e).__name__}")
+                    self._record_failure(str(gift_id), url, True)
                     self.error_handler.handle_network_error(None, e, f"загрузке изображения подарка {gift_id}")
                     return None
         except Exception as e:
             self.logger.error(f"Ошибка при создании данных подарка: {str(e)}", exc_info=True)
+            with self.lock:
+                self._release_trial(url)
             self.error_handler.show_error_dialog(None, "Ошибка обработки подарка", 
                                                  f"Не удалось создать данные для подарка ID {gift_id}", str(e))
             return None
     
+    def fetch_async(self, gift_id, name, url, callback=None):
+        """
+        Ставит загрузку изображения подарка в фоновую очередь и сразу возвращает управление.
+        Повторные запросы одного подарка объединяются; callback вызывается из потока загрузки
+        с GiftData или None при ошибке
+        """
+        with self.lock:
+            if self._is_blocked(str(gift_id), url):
+                return
+            if not self._claim(str(gift_id), callback):
+                # Загрузка уже идет, пробный запрос к хосту не понадобился
+                self._release_trial(url)
+                return
+            loop = self._ensure_loop()
+        asyncio.run_coroutine_threadsafe(self._download(gift_id, name, url), loop)
+        self.logger.debug(f"Загрузка изображения подарка ID {gift_id} поставлена в очередь")
+
+    def prefetch(self, gifts):
+        """
+        Загружает в кэш каталог подарков в фоне. gifts - список (ID, название, URL изображения);
+        подарки, уже находящиеся в кэше или в загрузке, пропускаются
+        """
+        with self.lock:
+            missing = [gift for gift in gifts if str(gift[0]) not in self.gift_dict]
+            if not missing:
+                self.logger.debug("Все подарки каталога уже в кэше")
+                return
+            loop = self._ensure_loop()
+        asyncio.run_coroutine_threadsafe(self._prefetch(missing), loop)
+        self.logger.info(f"Предзагрузка {len(missing)} подарков из {len(gifts)} поставлена в очередь")
+
+    async def _prefetch(self, gifts):
+        semaphore = asyncio.Semaphore(self.PREFETCH_CONCURRENCY)
+
+        async def fetch(gift_id, name, url):
+            async with semaphore:
+                with self.lock:
+                    # Подарок мог прийти в чате и загрузиться, пока предзагрузка ждала очереди
+                    if str(gift_id) in self.gift_dict or self._is_blocked(str(gift_id), url):
+                        return None
+                    if not self._claim(str(gift_id), None):
+                        self._release_trial(url)
+                        return None
+                return await self._download(gift_id, name, url)
+
+        results = await asyncio.gather(*(fetch(*gift) for gift in gifts))
+        self.logger.info(f"Предзагрузка каталога завершена: загружено {sum(1 for r in results if r)} подарков")
+
+    def _is_blocked(self, gift_id_str, url):
+        """
+        Проверяет, что загрузку сейчас выполнять не нужно: подарок недавно не загрузился
+        или хост временно отключен размыкателем (вызывается под self.lock).
+        Если возвращает False при разомкнутой цепи, загрузка считается пробным запросом
+        к хосту и должна завершиться _record_success, _record_failure или _release_trial
+        """
+        retry_at = self._failed.get(gift_id_str)
+        if retry_at is not None:
+            if time.monotonic() < retry_at:
+                return True
+            del self._failed[gift_id_str]
+        breaker = self._breakers.get(urlsplit(url).hostname or "")
+        return breaker is not None and not breaker.allow()
+
+    def _record_failure(self, gift_id_str, url, host_error):
+        """
+        Запоминает неудачную загрузку. Ошибки сети и сервера (5xx) учитываются размыкателем хоста,
+        ошибки конкретного изображения (4xx) - только кэшем неудач: хост ответил, значит, он доступен
+        """
+        host = urlsplit(url).hostname or ""
+        with self.lock:
+            self._failed[gift_id_str] = time.monotonic() + self.FAILURE_TTL
+            if not host_error:
+                self._host_responded(host)
+                return
+            breaker = self._breakers.setdefault(
+                host, CircuitBreaker(self.BREAKER_THRESHOLD, self.BREAKER_RESET_TIMEOUT))
+            if breaker.record_failure():
+                self.logger.warning(f"Загрузка изображений с {host} приостановлена на "
+                                    f"{self.BREAKER_RESET_TIMEOUT} с после {breaker.failures} ошибок подряд")
+
+    def _record_success(self, url):
+        with self.lock:
+            self._host_responded(urlsplit(url).hostname or "")
+
+    def _host_responded(self, host):
+        """Хост вернул HTTP-ответ: цепь замыкается (вызывается под self.lock)"""
+        breaker = self._breakers.get(host)
+        if breaker is not None:
+            if breaker.is_open:
+                self.logger.info(f"Загрузка изображений с {host} возобновлена")
+            breaker.record_success()
+
+    def _release_trial(self, url):
+        """Отменяет пробный запрос к хосту, так и не получивший ответа (вызывается под self.lock)"""
+        breaker = self._breakers.get(urlsplit(url).hostname or "")
+        if breaker is not None:
+            breaker.release_trial()
+
+    def _claim(self, gift_id_str, callback):
+        """
+        Регистрирует ожидание загрузки подарка (вызывается под self.lock).
+        Возвращает True, если загрузку нужно запустить, и False, если она уже выполняется
+        """
+        callbacks = self._pending.get(gift_id_str)
+        if callbacks is not None:
+            if callback:
+                callbacks.append(callback)
+            return False
+        self._pending[gift_id_str] = [callback] if callback else []
+        return True
+
+    def _ensure_loop(self):
+        """Запускает фоновый цикл загрузок при первом обращении (вызывается под self.lock)"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=self._loop.run_forever, name="GiftDownloader")
+            thread.daemon = True
+            thread.start()
+        return self._loop
+
+    async def _download(self, gift_id, name, url):
+        gift_id_str = str(gift_id)
+        gift = None
+        try:
+            if self._session is None:
+                # Пул соединений ограничивает число одновременных загрузок
+                self._session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.DOWNLOAD_CONCURRENCY),
+                    timeout=aiohttp.ClientTimeout(total=self.DOWNLOAD_TIMEOUT)
+                )
+            async with self._session.get(url) as response:
+                if response.status != 200:
+                    self.logger.error(f"Ошибка при загрузке изображения подарка ID {gift_id}: HTTP {response.status}")
+                    self._record_failure(gift_id_str, url, response.status >= 500)
+                else:
+                    content = await response.read()
+                    self._record_success(url)
+                    image_data = self._ingest(gift_id, name, content)
+                    gift = GiftData(id=gift_id, name=name, image=image_data)
+                    self._schedule_save()
+                    self.logger.info(f"Изображение подарка ID {gift_id} загружено")
+        except Exception as e:
+            self.logger.error(f"Ошибка при фоновой загрузке изображения подарка ID {gift_id}: {str(e)}")
+            self._record_failure(gift_id_str, url, True)
+        finally:
+            with self.lock:
+                callbacks = self._pending.pop(gift_id_str, [])
+            for callback in callbacks:
+                try:
+                    callback(gift)
+                except Exception as e:
+                    self.logger.error(f"Ошибка в обработчике загрузки подарка ID {gift_id}: {str(e)}", exc_info=True)
+        return gift
+
+    def _ingest(self, gift_id, name, content):
+        """
+        Нормализует загруженное изображение в компактную миниатюру и помещает подарок в кэш.
+        Исходное изображение при включенной настройке сохраняется отдельным файлом
+        """
+        entry = {'name': name}
+        thumbnail = make_thumbnail(content, self.THUMBNAIL_SIZE)
+        if thumbnail is None:
+            # Без 'size' запись будет снова проверена при следующем запуске
+            self.logger.warning(f"Не удалось декодировать изображение подарка ID {gift_id}, сохраняется исходное")
+            thumbnail = content
+        else:
+            entry['size'] = self.THUMBNAIL_SIZE
+            self.logger.debug(f"Изображение подарка ID {gift_id} сжато: {len(content)} -> {len(thumbnail)} байт")
+        if self.settings.keep_original_gift_images:
+            try:
+                os.makedirs(self.ORIGINALS_DIR, exist_ok=True)
+                with open(os.path.join(self.ORIGINALS_DIR, str(gift_id)), 'wb') as f:
+                    f.write(content)
+            except OSError as e:
+                self.logger.error(f"Ошибка при сохранении исходного изображения подарка ID {gift_id}: {str(e)}")
+        image_data = entry['image'] = base64.b64encode(thumbnail).decode('utf-8')
+        with self.lock:
+            self.gift_dict[str(gift_id)] = entry
+        return image_data
+
+    async def _normalize_cached(self):
+        """Заменяет полноразмерные изображения из старого кэша миниатюрами (в цикле загрузок)"""
+        with self.lock:
+            items = [(key, data) for key, data in self.gift_dict.items() if data.get('size') != self.THUMBNAIL_SIZE]
+        for key, data in items:
+            try:
+                thumbnail = make_thumbnail(base64.b64decode(data['image']), self.THUMBNAIL_SIZE)
+                if thumbnail is not None:
+                    with self.lock:
+                        self.gift_dict[key] = {'name': data['name'], 'size': self.THUMBNAIL_SIZE,
+                                               'image': base64.b64encode(thumbnail).decode('utf-8')}
+            except Exception as e:
+                self.logger.error(f"Ошибка при сжатии изображения подарка ID {key}: {str(e)}")
+            # Отдаем управление загрузкам между изображениями
+            await asyncio.sleep(0)
+        self._schedule_save()
+        self.logger.info(f"Изображения {len(items)} подарков из кэша приведены к миниатюрам")
+
+    def _schedule_save(self):
+        """Откладывает сохранение кэша, объединяя близкие по времени загрузки (в цикле загрузок)"""
+        if self._save_handle is None:
+            self._save_handle = self._loop.call_later(self.SAVE_DELAY, self._save_pending)
+
+    def _save_pending(self):
+        self._save_handle = None
+        self._loop.create_task(self._save_to_file())
+
+    def close(self):
+        """Останавливает фоновые загрузки и сохраняет отложенные изменения кэша"""
+        with self.lock:
+            loop = self._loop
+            self._loop = None
+        if loop is None:
+            return
+        try:
+            async def shutdown():
+                if self._save_handle is not None:
+                    self._save_handle.cancel()
+                    self._save_handle = None
+                    await self._save_to_file()
+                if self._session is not None:
+                    await self._session.close()
+                    self._session = None
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+        except Exception as e:
+            self.logger.error(f"Ошибка при остановке загрузок подарков: {str(e)}", exc_info=True)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+
     def create_sync(self, gift_id, name, url):
         """
         Синхронный вариант метода create для использования из других потоков
@@ -0,0 +1,363 @@
+# services/history_service.py
+import re
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from utils.logger import Logger
+from utils.settings import Settings
+from models.data_models import TableItemView, AlertLevel, EventType
+
+class HistoryService:
+    """
+    Хранение истории событий стрима на диске (SQLite в режиме WAL).
+    События записываются фоновым потоком пакетами, чтение идет через отдельное соединение
+    """
+    # Пакет фиксируется при накоплении BATCH_SIZE событий или через FLUSH_INTERVAL секунд
+    BATCH_SIZE = 100
+    FLUSH_INTERVAL = 0.5
+    # Максимальное количество строк, возвращаемых query_events по умолчанию
+    QUERY_LIMIT = 1000
+    # Максимальное количество результатов полнотекстового поиска по умолчанию
+    SEARCH_LIMIT = 200
+    SCHEMA_VERSION = 3
+
+    _EVENT_COLUMNS = "seq, timestamp, name, event, alert_level, gift_name, event_type, user_id"
+
+    def __init__(self, settings=None):
+        self.logger = Logger().get_logger('HistoryService')
+        self.logger.info("Инициализация сервиса истории событий")
+        self.settings = settings or Settings()
+        self.db_file = "history.db"
+        self.session_id = None
+        self.stream = ""
+        self.conn = None
+        self._queue = queue.Queue()
+        self._writer = None
+        self.fts_available = False
+        try:
+            self.conn = self._connect()
+            self._create_schema()
+            self._writer = threading.Thread(target=self._writer_thread, name="HistoryWriter", daemon=True)
+            self._writer.start()
+            self.logger.debug(f"База истории событий открыта: {self.db_file}")
+        except Exception as e:
+            self.logger.error(f"Ошибка при открытии базы истории событий: {str(e)}", exc_info=True)
+            self.conn = None
+
+    @property
+    def available(self):
+        return self.conn is not None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # В режиме WAL NORMAL безопасен при сбое приложения и не делает fsync на каждую фиксацию
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self):
+        """Создает или обновляет таблицы и индексы истории"""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY,
+                stream TEXT NOT NULL,
+                started_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                session_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                timestamp REAL NOT NULL,
+                name TEXT NOT NULL,
+                event TEXT NOT NULL,
+                alert_level INTEGER NOT NULL,
+                gift_name TEXT NOT NULL DEFAULT ''
+            );
+        """)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 2:
+            # Версия 2: поток, пользователь и тип события для выборок по индексам
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(events)")}
+            for column, definition in (("stream", "TEXT NOT NULL DEFAULT ''"),
+                                       ("user_id", "TEXT NOT NULL DEFAULT ''"),
+                                       ("event_type", "INTEGER NOT NULL DEFAULT 0")):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE events ADD COLUMN {column} {definition}")
+        self.conn.executescript("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_events_session_seq ON events(session_id, seq);
+            CREATE INDEX IF NOT EXISTS idx_events_stream_time ON events(stream, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_events_time ON events(timestamp);
+            CREATE INDEX IF NOT EXISTS idx_events_user_time ON events(user_id, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_events_type_time ON events(event_type, timestamp);
+        """)
+        self._create_fts()
+        self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def _create_fts(self):
+        """
+        Создает полнотекстовый индекс комментариев (FTS5). Индекс обновляется триггерами
+        при вставке и изменении комментария, поэтому пополняется вместе с пакетами записи.
+        Комментарии, записанные до появления индекса, индексируются при его создании -
+        в том числе если при обновлении схемы SQLite еще не поддерживал FTS5
+        """
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'comments_fts'").fetchone() is not None
+        # Индекс и его заполнение создаются одной транзакцией: прерванный запуск не оставит пустой индекс
+        backfill = "" if exists else f"""
+                INSERT INTO comments_fts(rowid, event)
+                SELECT id, event FROM events WHERE event_type = {int(EventType.COMMENT)};"""
+        try:
+            self.conn.executescript(f"""
+                BEGIN;
+                CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+                    event, content='events', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS events_comments_ai AFTER INSERT ON events
+                WHEN new.event_type = {int(EventType.COMMENT)} BEGIN
+                    INSERT INTO comments_fts(rowid, event) VALUES (new.id, new.event);
+                END;
+                CREATE TRIGGER IF NOT EXISTS events_comments_ad AFTER DELETE ON events
+                WHEN old.event_type = {int(EventType.COMMENT)} BEGIN
+                    INSERT INTO comments_fts(comments_fts, rowid, event) VALUES ('delete', old.id, old.event);
+                END;
+                CREATE TRIGGER IF NOT EXISTS events_comments_au AFTER UPDATE OF event ON events
+                WHEN old.event_type = {int(EventType.COMMENT)} BEGIN
+                    INSERT INTO comments_fts(comments_fts, rowid, event) VALUES ('delete', old.id, old.event);
+                    INSERT INTO comments_fts(rowid, event) VALUES (new.id, new.event);
+                END;{backfill}
+                COMMIT;
+            """)
+            if not exists:
+                self.logger.info("Создан полнотекстовый индекс комментариев")
+            self.fts_available = True
+        except sqlite3.OperationalError as e:
+            self.conn.rollback()
+            self.logger.warning(f"Полнотекстовый поиск недоступен (нет поддержки FTS5 в SQLite): {str(e)}")
+
+    def start_session(self, stream):
+        """Начинает новую сессию мониторинга и возвращает ее ID"""
+        if not self.available:
+            return None
+        try:
+            self.flush()
+            cursor = self.conn.execute(
+                "INSERT INTO sessions (stream, started_at) VALUES (?, ?)", (stream, time.time())
+            )
+            self.conn.commit()
+            self.session_id = cursor.lastrowid
+            self.stream = stream
+            self.logger.info(f"Начата сессия истории {self.session_id} для стрима {stream}")
+            return self.session_id
+        except Exception as e:
+            self.logger.error(f"Ошибка при создании сессии истории: {str(e)}", exc_info=True)
+            return None
+
+    def append(self, item):
+        """
+        Ставит событие текущей сессии в очередь на запись (item.seq должен быть назначен).
+        Повторная запись с тем же номером обновляет строку. Безопасно вызывать из любого потока
+        """
+        if not self.available or self.session_id is None:
+            return
+        self._queue.put((
+            self.session_id, item.seq, item.timestamp.timestamp(), item.name, item.event,
+            int(item.alert_level), item.gift_name, self.stream, item.user_id, int(item.event_type)
+        ))
+
+    def _writer_thread(self):
+        """Записывает события пакетами в отдельном соединении"""
+        try:
+            conn = self._connect()
+        except Exception as e:
+            self.logger.error(f"Ошибка при открытии соединения записи истории: {str(e)}", exc_info=True)
+            return
+        batch = []
+        waiters = []
+        deadline = None
+        running = True
+        while running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                message = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                running = False
+            elif isinstance(message, threading.Event):
+                waiters.append(message)
+            elif message:
+                batch.append(message)
+                if deadline is None:
+                    deadline = time.monotonic() + self.FLUSH_INTERVAL
+            if batch and (not running or waiters or len(batch) >= self.BATCH_SIZE
+                          or time.monotonic() >= deadline):
+                self._write_batch(conn, batch)
+                batch = []
+                deadline = None
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+        conn.close()
+
+    def _write_batch(self, conn, batch):
+        try:
+            conn.executemany(
+                "INSERT INTO events (session_id, seq, timestamp, name, event, alert_level, "
+                "gift_name, stream, user_id, event_type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(session_id, seq) DO UPDATE SET timestamp = excluded.timestamp, "
+                "event = excluded.event, alert_level = excluded.alert_level, gift_name = excluded.gift_name",
+                batch
+            )
+            conn.commit()
+        except Exception as e:
+            self.logger.error(f"Ошибка при записи {len(batch)} событий в историю: {str(e)}", exc_info=True)
+
+    def fetch_range(self, session_id, first_seq, last_seq):
+        """Возвращает события сессии с номерами first_seq..last_seq в порядке убывания номера"""
+        if not self.available or session_id is None:
+            return []
+        try:
+            rows = self.conn.execute(
+                f"SELECT {self._EVENT_COLUMNS} FROM events "
+                "WHERE session_id = ? AND seq BETWEEN ? AND ? ORDER BY seq DESC",
+                (session_id, first_seq, last_seq)
+            ).fetchall()
+            return [self._row_to_item(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Ошибка при чтении истории событий: {str(e)}", exc_info=True)
+            return []
+
+    def _build_where(self, stream, user_id, event_type, since, until):
+        conditions = []
+        params = []
+        if stream:
+            conditions.append("stream = ?")
+            params.append(stream)
+        if user_id:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if event_type is not None:
+            conditions.append("event_type = ?")
+            params.append(int(event_type))
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since.timestamp() if isinstance(since, datetime) else since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until.timestamp() if isinstance(until, datetime) else until)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    def query_events(self, stream=None, user_id=None, event_type=None, since=None, until=None, limit=None):
+        """
+        Выборка событий по индексам без загрузки всей истории, новые сначала.
+        Например, все подарки пользователя за неделю:
+        query_events(user_id="x", event_type=EventType.GIFT, since=datetime.now() - timedelta(days=7))
+        """
+        if not self.available:
+            return []
+        try:
+            where, params = self._build_where(stream, user_id, event_type, since, until)
+            rows = self.conn.execute(
+                f"SELECT {self._EVENT_COLUMNS} FROM events{where} ORDER BY timestamp DESC LIMIT ?",
+                params + [limit or self.QUERY_LIMIT]
+            ).fetchall()
+            return [self._row_to_item(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Ошибка при выборке из истории событий: {str(e)}", exc_info=True)
+            return []
+
+    def count_events(self, stream=None, user_id=None, event_type=None, since=None, until=None):
+        """Подсчитывает события по тем же условиям, что и query_events"""
+        if not self.available:
+            return 0
+        try:
+            where, params = self._build_where(stream, user_id, event_type, since, until)
+            return self.conn.execute(f"SELECT COUNT(*) FROM events{where}", params).fetchone()[0]
+        except Exception as e:
+            self.logger.error(f"Ошибка при подсчете событий в истории: {str(e)}", exc_info=True)
+            return 0
+
+    @staticmethod
+    def _build_match(query):
+        """
+        Преобразует пользовательский запрос в выражение FTS5:
+        "точная фраза", слово* - поиск по префиксу, остальные слова объединяются через AND
+        """
+        terms = []
+        for phrase, word in re.findall(r'"([^"]+)"|(\S+)', query):
+            if phrase:
+                terms.append('"' + phrase.replace('"', '') + '"')
+            else:
+                prefix = word.endswith("*")
+                word = word.rstrip("*").replace('"', '')
+                if word:
+                    terms.append(f'"{word}"' + ("*" if prefix else ""))
+        return " ".join(terms)
+
+    def search_comments(self, query, stream=None, user_id=None, limit=None):
+        """
+        Полнотекстовый поиск по всем сохраненным комментариям, новые сначала.
+        Поддерживаются фразы в кавычках и поиск по префиксу (слово*)
+        """
+        if not self.available or not self.fts_available:
+            return []
+        match = self._build_match(query)
+        if not match:
+            return []
+        try:
+            self.flush()
+            sql = (f"SELECT {', '.join('e.' + column for column in self._EVENT_COLUMNS.split(', '))} "
+                   "FROM comments_fts JOIN events e ON e.id = comments_fts.rowid "
+                   "WHERE comments_fts MATCH ?")
+            params = [match]
+            if stream:
+                sql += " AND e.stream = ?"
+                params.append(stream)
+            if user_id:
+                sql += " AND e.user_id = ?"
+                params.append(user_id)
+            sql += " ORDER BY e.timestamp DESC LIMIT ?"
+            params.append(limit or self.SEARCH_LIMIT)
+            rows = self.conn.execute(sql, params).fetchall()
+            self.logger.debug(f"Поиск по комментариям '{query}': найдено {len(rows)}")
+            return [self._row_to_item(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"Ошибка полнотекстового поиска по комментариям: {str(e)}", exc_info=True)
+            return []
+
+    def _row_to_item(self, row):
+        seq, timestamp, name, event, alert_level, gift_name, event_type, user_id = row
+        return TableItemView(
+            timestamp=datetime.fromtimestamp(timestamp),
+            name=name,
+            event=event,
+            alert_level=AlertLevel(alert_level),
+            gift_name=gift_name,
+            seq=seq,
+            event_type=EventType(event_type),
+            user_id=user_id
+        )
+
+    def flush(self, timeout=5.0):
+        """Дожидается записи всех событий, поставленных в очередь"""
+        if not self.available or self._writer is None or not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            self.logger.warning("Таймаут ожидания записи истории событий")
+
+    def close(self):
+        """Записывает оставшиеся события и закрывает базу"""
+        if not self.available:
+            return
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=5.0)
+        self.conn.close()
+        self.conn = None
+        self.logger.debug("База истории событий закрыта")
@@ -0,0 +1,230 @@
+# services/rule_engine.py
+import os
+import json
+import threading
+import time
+from dataclasses import dataclass
+from models.data_models import EventType
+from utils.logger import Logger
+from utils.settings import Settings
+from utils.aho_corasick import PhraseMatcher
+
+# Действия правил
+ACTION_SOUND = "sound"  # Воспроизвести звук (без указания звука для подарка - звук, привязанный к подарку)
+ACTION_SPEECH = "speech"  # Озвучить текст
+ACTION_HIGHLIGHT = "highlight"  # Выделить строку события
+ACTION_DROP = "drop"  # Не показывать и не сохранять событие
+ACTION_AGGREGATE = "aggregate"  # Объединять события в одну строку со счетчиком
+ACTIONS = (ACTION_SOUND, ACTION_SPEECH, ACTION_HIGHLIGHT, ACTION_DROP, ACTION_AGGREGATE)
+
+@dataclass(frozen=True)
+class EventRule:
+    """
+    Правило обработки события: пустые условия не проверяются.
+    В тексте озвучивания @name - имя пользователя, @gift - подарок, @count - количество,
+    @comment - текст комментария
+    """
+    event_type: EventType
+    action: str
+    user: str = ""  # ID (@unique_id) или имя пользователя, без учета регистра
+    gift_id: int = 0
+    min_diamonds: int = 0  # Минимальная стоимость подарка в алмазах с учетом количества
+    text: str = ""  # Слово или фраза в комментарии
+    sound: str = ""
+    speech: str = ""
+
+    def render_speech(self, item, name=None):
+        """Подставляет данные события в текст озвучивания; name заменяет имя пользователя"""
+        text = (self.speech.replace("@name", name or item.name).replace("@gift", item.gift_name)
+                .replace("@count", str(item.gift_count or 1)).replace("@comment", item.event))
+        if item.event_type == EventType.GIFT and item.gift_count > 1 and "@count" not in self.speech:
+            text += f", {item.gift_count} штук"
+        return text
+
+@dataclass(frozen=True)
+class RuleDecision:
+    """Итог применения правил к событию"""
+    drop: bool = False
+    highlight: bool = False
+    aggregate: bool = False
+    alerts: tuple = ()  # Правила со звуком и озвучиванием
+
+NO_DECISION = RuleDecision()
+
+class _Dispatch:
+    """Правила одного типа событий, разложенные по индексам"""
+    __slots__ = ('always', 'by_gift', 'by_user', 'text_rules', 'matcher')
+
+    def __init__(self):
+        self.always = []
+        self.by_gift = {}
+        self.by_user = {}
+        self.text_rules = []
+        self.matcher = None
+
+class RuleEngine:
+    """
+    Декларативные правила событий. Правила из rules.json, триггеры комментариев и флаги
+    озвучивания из настроек компилируются в таблицу диспетчеризации по типу события:
+    для каждого события проверяются только правила его типа, отобранные по ID подарка,
+    пользователю и фразам (одним проходом автомата), а не весь список правил.
+    Изменения rules.json применяются без перезапуска: время изменения файла проверяется
+    не чаще раза в RULES_CHECK_INTERVAL секунд
+    """
+    RULES_CHECK_INTERVAL = 2.0
+
+    def __init__(self, settings=None, trigger_service=None):
+        self.logger = Logger().get_logger('RuleEngine')
+        self.logger.info("Инициализация движка правил")
+        self.settings = settings or Settings()
+        self.trigger_service = trigger_service
+        self.store_name = "rules.json"
+        self.lock = threading.Lock()
+        self._rules_mtime = self._file_mtime()
+        self._checked_at = time.monotonic()
+        self.rules = self._load_rules()
+        if self.trigger_service:
+            self.trigger_service.listeners.append(self.reload)
+        self._table = {}
+        self.reload()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.store_name).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load_rules(self):
+        if not os.path.exists(self.store_name):
+            return []
+        try:
+            with open(self.store_name, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Ошибка при загрузке правил: {str(e)}", exc_info=True)
+            return []
+        rules = []
+        for number, data in enumerate(entries, 1):
+            # Ошибка в одном правиле не отключает остальные
+            try:
+                rule = EventRule(**dict(data, event_type=EventType[data["event_type"]]))
+            except Exception as e:
+                self.logger.error(f"Правило {number} в {self.store_name} пропущено: {type(e).__name__}: {str(e)}")
+                continue
+            if rule.action not in ACTIONS:
+                self.logger.warning(f"Неизвестное действие правила: {rule.action}")
+                continue
+            rules.append(rule)
+        self.logger.debug(f"Загружено {len(rules)} правил из {self.store_name}")
+        return rules
+
+    def _check_rules_file(self):
+        """Перечитывает rules.json, если файл изменился; возвращает True, если правила обновлены"""
+        self._checked_at = time.monotonic()
+        mtime = self._file_mtime()
+        if mtime == self._rules_mtime:
+            return False
+        self._rules_mtime = mtime
+        self.rules = self._load_rules()
+        self.logger.info(f"Правила перечитаны из {self.store_name}")
+        return True
+
+    @staticmethod
+    def _builtin_rules():
+        """Правила, действующие всегда, независимо от rules.json: подарки выделяются, как и раньше"""
+        return [EventRule(EventType.GIFT, ACTION_HIGHLIGHT)]
+
+    def _settings_rules(self):
+        """Правила, соответствующие флагам звуковых оповещений и озвучивания в настройках"""
+        rules = []
+        if self.settings.notify_gift:
+            rules.append(EventRule(EventType.GIFT, ACTION_SOUND))
+        if self.settings.speech_gift:
+            rules.append(EventRule(EventType.GIFT, ACTION_SPEECH, speech="@name отправил подарок @gift"))
+        if self.settings.speech_like:
+            rules.append(EventRule(EventType.LIKE, ACTION_SPEECH, speech=self.settings.like_text))
+        if self.settings.speech_member:
+            rules.append(EventRule(EventType.JOIN, ACTION_SPEECH, speech=self.settings.join_text))
+        return rules
+
+    def _trigger_rules(self):
+        """Правила, соответствующие триггерам комментариев"""
+        rules = []
+        for trigger in self.trigger_service.rules() if self.trigger_service else []:
+            if trigger.sound:
+                rules.append(EventRule(EventType.COMMENT, ACTION_SOUND, text=trigger.phrase, sound=trigger.sound))
+            if trigger.speech:
+                rules.append(EventRule(EventType.COMMENT, ACTION_SPEECH, text=trigger.phrase, speech=trigger.speech))
+            if trigger.highlight:
+                rules.append(EventRule(EventType.COMMENT, ACTION_HIGHLIGHT, text=trigger.phrase))
+        return rules
+
+    def reload(self):
+        """
+        Перекомпилирует таблицу правил. Новая таблица подменяет старую одной ссылкой,
+        поэтому изменения применяются без перезапуска мониторинга
+        """
+        self._check_rules_file()
+        with self.lock:
+            table = {}
+            rules = self._builtin_rules() + self.rules + self._settings_rules() + self._trigger_rules()
+            for rule in rules:
+                dispatch = table.setdefault(rule.event_type, _Dispatch())
+                # Каждое правило попадает в самый избирательный индекс; остальные условия
+                # проверяются только для отобранных правил
+                if rule.text:
+                    dispatch.text_rules.append(rule)
+                elif rule.gift_id:
+                    dispatch.by_gift.setdefault(rule.gift_id, []).append(rule)
+                elif rule.user:
+                    dispatch.by_user.setdefault(rule.user.casefold(), []).append(rule)
+                else:
+                    dispatch.always.append(rule)
+            for dispatch in table.values():
+                if dispatch.text_rules:
+                    dispatch.matcher = PhraseMatcher([rule.text for rule in dispatch.text_rules])
+            self._table = table
+        self.logger.debug(f"Скомпилировано {len(rules)} правил для {len(table)} типов событий")
+
+    @staticmethod
+    def _conditions_match(rule, item):
+        if rule.user and rule.user.casefold() not in (item.user_id.casefold(), item.name.casefold()):
+            return False
+        if rule.gift_id and rule.gift_id != item.gift_id:
+            return False
+        if rule.min_diamonds and item.diamond_count * max(item.gift_count, 1) < rule.min_diamonds:
+            return False
+        return True
+
+    def evaluate(self, item):
+        """Применяет правила к событию и возвращает RuleDecision"""
+        if time.monotonic() - self._checked_at >= self.RULES_CHECK_INTERVAL and self._check_rules_file():
+            self.reload()
+        dispatch = self._table.get(item.event_type)
+        if dispatch is None:
+            return NO_DECISION
+        candidates = list(dispatch.always)
+        if item.gift_id and dispatch.by_gift:
+            candidates.extend(dispatch.by_gift.get(item.gift_id, ()))
+        if dispatch.by_user:
+            candidates.extend(dispatch.by_user.get(item.user_id.casefold(), ()))
+            if item.name.casefold() != item.user_id.casefold():
+                candidates.extend(dispatch.by_user.get(item.name.casefold(), ()))
+        if dispatch.matcher is not None:
+            candidates.extend(dispatch.text_rules[index] for index in dispatch.matcher.match(item.event))
+        if not candidates:
+            return NO_DECISION
+        drop = highlight = aggregate = False
+        alerts = []
+        for rule in candidates:
+            if not self._conditions_match(rule, item):
+                continue
+            if rule.action == ACTION_DROP:
+                drop = True
+            elif rule.action == ACTION_HIGHLIGHT:
+                highlight = True
+            elif rule.action == ACTION_AGGREGATE:
+                aggregate = True
+            else:
+                alerts.append(rule)
+        return RuleDecision(drop, highlight, aggregate, tuple(alerts))
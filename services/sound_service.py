@@ -1,36 +1,47 @@
 import pygame
-import json
 import os
 import random
 import time
 import threading
 from utils.logger import Logger
+from utils.settings import Settings
+from utils.audio_utils import transcode_for_mixer
+from utils.json_store import JsonStore
 
 class SoundService:
-    def __init__(self):
+    # Звуки длиннее этого не импортируются (с)
+    MAX_SOUND_SECONDS = 30
+    # Через сколько секунд после изменения привязки записываются в файл
+    SAVE_DELAY = 2.0
+
+    def __init__(self, settings=None):
         self.logger = Logger().get_logger('SoundService')
         self.logger.info("Инициализация звукового сервиса")
+        self.settings = settings or Settings()
         
         pygame.mixer.init()
         self.logger.debug("Pygame mixer инициализирован")
         
         self.store_name = "giftsounds.json"
-        self.store = {}
+        # Привязки читаются потоками воспроизведения без блокировки и без обращения к диску
+        self.store = JsonStore(self.store_name, self.SAVE_DELAY)
+        self.logger.debug(f"Загружено {len(self.store)} звуковых привязок из {self.store_name}")
         self.play_time = 0
         self.lock = threading.Lock()
-        
-        if os.path.exists(self.store_name):
-            try:
-                with open(self.store_name, 'r') as f:
-                    self.store = json.load(f)
-                self.logger.debug(f"Загружено {len(self.store)} звуковых привязок из {self.store_name}")
-            except Exception as e:
-                self.logger.error(f"Ошибка при загрузке звуковых привязок: {str(e)}", exc_info=True)
-        else:
-            self.logger.debug(f"Файл {self.store_name} не найден, инициализация пустого словаря")
+        # Коэффициенты громкости импортированных звуков: файл -> громкость воспроизведения
+        self.gains_name = "soundgains.json"
+        self.gains = JsonStore(self.gains_name, self.SAVE_DELAY)
+        # Загруженные звуки с примененной громкостью: файл -> (время изменения файла, pygame.mixer.Sound)
+        self._sounds = {}
+        # Список файлов в assets, обновляется вызовом sound_list()
+        self._available_sounds = []
+        self.sound_list()
     
     def sound_list(self):
-        """Возвращает список доступных звуковых файлов"""
+        """
+        Возвращает список доступных звуковых файлов. Звуки, файлы которых удалены
+        или изменены после загрузки, выгружаются из памяти
+        """
         try:
             if not os.path.exists("assets"):
                 os.makedirs("assets")
@@ -38,6 +49,10 @@ class SoundService:
             
             sounds = [f for f in os.listdir("assets") 
                       if f.lower().endswith(('.wav', '.mp3'))]
+            self._available_sounds = sounds
+            for sound, (mtime, _) in list(self._sounds.items()):
+                if self._file_mtime(sound) != mtime:
+                    self._sounds.pop(sound, None)
             self.logger.debug(f"Найдено {len(sounds)} звуковых файлов: {sounds}")
             return sounds
         except Exception as e:
@@ -47,7 +62,7 @@ class SoundService:
     def play_list(self):
         """Возвращает список привязок звуков к ID подарков"""
         try:
-            result = [(int(k), v) for k, v in self.store.items()]
+            result = [(int(k), v) for k, v in self.store.snapshot().items()]
             self.logger.debug(f"Список привязок звуков: {result}")
             return result
         except Exception as e:
@@ -57,23 +72,21 @@ class SoundService:
     def update(self, key, value):
         """Обновляет привязку звука к ID подарка"""
         try:
-            key_str = str(key)
-            if key_str not in self.store or self.store[key_str] != value:
-                self.store[key_str] = value
-                try:
-                    with open(self.store_name, 'w') as f:
-                        json.dump(self.store, f, indent=2)
-                    self.logger.debug(f"Обновлена привязка звука для ID {key}: {value}")
-                except Exception as e:
-                    self.logger.error(f"Ошибка при сохранении звуковых привязок: {str(e)}", exc_info=True)
+            # Файл записывается позже в фоновом потоке
+            if self.store.set(str(key), value):
+                self.logger.debug(f"Обновлена привязка звука для ID {key}: {value}")
         except Exception as e:
             self.logger.error(f"Ошибка при обновлении привязки звука: {str(e)}", exc_info=True)
+
+    def add_mapping(self, gift_id, sound):
+        """Привязывает звук к ID подарка"""
+        self.update(gift_id, sound)
     
     def any(self):
         """Возвращает случайный доступный звуковой файл"""
         try:
-            audio_list = self.sound_list()
-            for sound in self.store.values():
+            audio_list = list(self._available_sounds)
+            for sound in self.store.snapshot().values():
                 if sound in audio_list:
                     audio_list.remove(sound)
             
@@ -99,6 +112,16 @@ class SoundService:
         except Exception as e:
             self.logger.error(f"Ошибка при запуске воспроизведения звука: {str(e)}", exc_info=True)
     
+    def play_file(self, sound, delay):
+        """Запускает воспроизведение звукового файла из assets с задержкой"""
+        try:
+            self.logger.debug(f"Запрос на воспроизведение звука {sound} с задержкой {delay} мс")
+            thread = threading.Thread(target=self._play_file_thread, args=(sound, delay))
+            thread.daemon = True
+            thread.start()
+        except Exception as e:
+            self.logger.error(f"Ошибка при запуске воспроизведения звука: {str(e)}", exc_info=True)
+    
     def _play_thread(self, key, delay):
         """Воспроизводит звук в отдельном потоке"""
         try:
@@ -112,35 +135,112 @@ class SoundService:
                     if sound:
                         self.update(key, sound)
                 
-                elapsed = time.time() - self.play_time
-                wait_time = delay / 1000 - elapsed
-                if wait_time > 0:
-                    self.logger.debug(f"Ожидание {wait_time:.2f} с перед воспроизведением")
-                    time.sleep(wait_time)
-                
-                self.play_time = time.time()
-                
-                if sound:
-                    sound_path = os.path.join(os.getcwd(), "assets", sound)
-                    if os.path.exists(sound_path):
-                        try:
-                            sound_obj = pygame.mixer.Sound(sound_path)
-                            sound_obj.play()
-                            self.logger.debug(f"Воспроизведение звука: {sound}")
-                        except Exception as e:
-                            self.logger.error(f"Ошибка воспроизведения звука: {str(e)}", exc_info=True)
-                    else:
-                        self.logger.error(f"Файл не найден: {sound_path}")
-                else:
-                    self.logger.warning("Нет доступных звуков для воспроизведения")
+                self._play_sound(sound, delay)
         except Exception as e:
             self.logger.error(f"Ошибка в потоке воспроизведения звука: {str(e)}", exc_info=True)
     
+    def _play_file_thread(self, sound, delay):
+        """Воспроизводит звуковой файл в отдельном потоке"""
+        try:
+            with self.lock:
+                self._play_sound(sound, delay)
+        except Exception as e:
+            self.logger.error(f"Ошибка в потоке воспроизведения звука: {str(e)}", exc_info=True)
+    
+    def _play_sound(self, sound, delay):
+        """Выдерживает задержку после предыдущего звука и воспроизводит файл (под self.lock)"""
+        elapsed = time.time() - self.play_time
+        wait_time = delay / 1000 - elapsed
+        if wait_time > 0:
+            self.logger.debug(f"Ожидание {wait_time:.2f} с перед воспроизведением")
+            time.sleep(wait_time)
+        
+        self.play_time = time.time()
+        
+        if sound:
+            try:
+                sound_obj = self._load_sound(sound)
+                if sound_obj is not None:
+                    sound_obj.play()
+                    self.logger.debug(f"Воспроизведение звука: {sound}")
+            except Exception as e:
+                self.logger.error(f"Ошибка воспроизведения звука: {str(e)}", exc_info=True)
+        else:
+            self.logger.warning("Нет доступных звуков для воспроизведения")
+    
+    def import_sound(self, source_path):
+        """
+        Проверяет звуковой файл и сохраняет его в assets в формате микшера (WAV) с выравниванием
+        громкости. Возвращает имя файла в assets: существующий файл с тем же именем не заменяется,
+        новый получает номер ("Звук (2).wav"). Привязки к звуку с именем исходного файла
+        (например, загруженному раньше "Звук.mp3") переносятся на новый файл.
+        Выполняется долго, вызывается из фонового потока
+        """
+        os.makedirs("assets", exist_ok=True)
+        original = os.path.basename(source_path)
+        name = os.path.splitext(original)[0]
+        sound = name + ".wav"
+        number = 2
+        while os.path.exists(os.path.join("assets", sound)):
+            sound = f"{name} ({number}).wav"
+            number += 1
+        destination = os.path.join("assets", sound)
+        partial_path = destination + ".part"
+        try:
+            gain, duration = transcode_for_mixer(source_path, partial_path, self.MAX_SOUND_SECONDS)
+            os.replace(partial_path, destination)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+        self.gains.set(sound, round(gain, 4))
+        # Следующее воспроизведение загрузит новый файл
+        self._sounds.pop(sound, None)
+        if sound not in self._available_sounds:
+            self._available_sounds = self._available_sounds + [sound]
+        if original != sound and os.path.exists(os.path.join("assets", original)):
+            for key, mapped in self.store.snapshot().items():
+                if mapped == original:
+                    self.update(key, sound)
+                    self.logger.info(f"Привязка звука для ID {key} перенесена с {original} на {sound}")
+        self.logger.info(f"Импортирован звук {sound}: {duration:.1f} с, громкость {gain:.2f}")
+        return sound
+
+    @staticmethod
+    def _file_mtime(sound):
+        try:
+            return os.stat(os.path.join("assets", sound)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load_sound(self, sound):
+        """
+        Возвращает звук из памяти. С диска файл читается при первом воспроизведении
+        и после того, как sound_list() обнаружил изменение файла
+        """
+        cached = self._sounds.get(sound)
+        if cached is not None:
+            return cached[1]
+        sound_path = os.path.join(os.getcwd(), "assets", sound)
+        mtime = self._file_mtime(sound)
+        if mtime is None:
+            self.logger.error(f"Файл не найден: {sound_path}")
+            return None
+        sound_obj = pygame.mixer.Sound(sound_path)
+        sound_obj.set_volume(self.gains.get(sound, 1.0))
+        self._sounds[sound] = (mtime, sound_obj)
+        return sound_obj
+
     def get_mappings(self):
         """Возвращает текущие привязки звуков к ID подарков"""
         try:
-            self.logger.debug(f"Получены привязки звуков: {self.store}")
-            return self.store
+            mappings = self.store.snapshot()
+            self.logger.debug(f"Получены привязки звуков: {mappings}")
+            return mappings
         except Exception as e:
             self.logger.error(f"Ошибка при получении привязок звуков: {str(e)}", exc_info=True)
             return {}
+
+    def close(self):
+        """Записывает отложенные изменения привязок и громкости звуков"""
+        self.store.close()
+        self.gains.close()
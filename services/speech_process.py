@@ -0,0 +1,195 @@
+# services/speech_process.py
+import multiprocessing
+import threading
+import pyttsx3
+from utils.logger import Logger
+
+class Synthesizer:
+    """Синтез речи движком pyttsx3 в текущем процессе"""
+    def __init__(self):
+        self.logger = Logger().get_logger('Synthesizer')
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', 180)  # Скорость речи по умолчанию
+
+    def voices(self):
+        return [voice.name for voice in self.engine.getProperty('voices')]
+
+    def set_volume(self, volume):
+        self.engine.setProperty('volume', volume)
+
+    def configure(self, voice_name, rate):
+        if voice_name:
+            voices = self.engine.getProperty('voices')
+            voice_found = False
+            for voice in voices:
+                if voice.name == voice_name:
+                    self.logger.debug(f"Установлен голос: {voice_name}")
+                    self.engine.setProperty('voice', voice.id)
+                    voice_found = True
+                    break
+
+            if not voice_found:
+                self.logger.warning(f"Голос {voice_name} не найден, используется голос по умолчанию")
+
+        if rate is not None:
+            real_rate = 150 + (rate * 10)  # Преобразуем из -10..10 в 50..250
+            self.logger.debug(f"Установлена скорость речи: {real_rate}")
+            self.engine.setProperty('rate', real_rate)
+
+    def say(self, text, voice_name, rate, volume):
+        """Произносит фразу и ждет окончания"""
+        self.configure(voice_name, rate)
+        if volume is not None:
+            self.set_volume(volume)
+        self.engine.say(text)
+        self.engine.runAndWait()
+
+    def render(self, text, voice_name, rate, path):
+        """Синтезирует фразу с полной громкостью в файл path"""
+        self.configure(voice_name, rate)
+        # Громкость фразы задается при воспроизведении файла; громкость движка для say() сохраняется
+        volume = self.engine.getProperty('volume')
+        self.set_volume(1.0)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+        finally:
+            self.set_volume(volume)
+
+    def stop(self):
+        self.engine.stop()
+
+    def close(self):
+        pass
+
+def _worker_main(connection):
+    """Точка входа дочернего процесса: выполняет команды Synthesizer, полученные по каналу"""
+    # Свой файл лога: app.log открыт основным процессом
+    Logger(log_file="speech_worker.log")
+    synthesizer = Synthesizer()
+    while True:
+        try:
+            command, args = connection.recv()
+        except (EOFError, OSError):
+            break
+        if command == "exit":
+            break
+        try:
+            connection.send((True, getattr(synthesizer, command)(*args)))
+        except Exception as e:
+            connection.send((False, str(e)))
+
+class SpeechProcess:
+    """
+    Тот же интерфейс, что у Synthesizer, но движок работает в дочернем процессе.
+    Зависший движок завершается по таймауту, упавший перезапускается при следующем запросе,
+    а stop() прерывает текущую фразу завершением процесса: основной процесс
+    никогда не ждет движок дольше таймаута
+    """
+    # Сколько ждать запуска процесса и ответа на служебный запрос (с)
+    START_TIMEOUT = 15
+    REQUEST_TIMEOUT = 10
+    # Дополнительное время на каждый символ произносимой фразы (с)
+    SECONDS_PER_CHAR = 0.3
+
+    def __init__(self):
+        self.logger = Logger().get_logger('SpeechProcess')
+        # request_lock упорядочивает запросы по каналу, lock защищает сам процесс
+        self.request_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.process = None
+        self.connection = None
+        self.volume = None
+        self._voices = None
+        self._busy = False
+        self._cancelled = False
+
+    def _start(self):
+        # spawn: дочерний процесс не наследует потоки, Qt и аудио основного процесса
+        context = multiprocessing.get_context("spawn")
+        connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection,),
+                                       name="SpeechWorker", daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.connection = connection
+        self.logger.info(f"Запущен процесс синтеза речи (PID {self.process.pid})")
+
+    def _kill(self):
+        with self.lock:
+            if self.process is not None:
+                self.process.kill()
+                self.process.join(1)
+                self.connection.close()
+                self.process = None
+                self.connection = None
+
+    def _request(self, command, args=(), timeout=None):
+        """Выполняет команду в дочернем процессе; возвращает результат или None при сбое"""
+        with self.request_lock:
+            timeout = timeout or self.REQUEST_TIMEOUT
+            with self.lock:
+                if self.process is not None and not self.process.is_alive():
+                    self.logger.warning(f"Процесс синтеза речи завершился с кодом {self.process.exitcode}, перезапуск")
+                    self.connection.close()
+                    self.process = None
+                if self.process is None:
+                    self._start()
+                    timeout += self.START_TIMEOUT
+                connection = self.connection
+                self._busy = True
+                self._cancelled = False
+            try:
+                connection.send((command, args))
+                if not connection.poll(timeout):
+                    self.logger.error(f"Процесс синтеза речи не ответил за {timeout:.0f} с, перезапуск")
+                    self._kill()
+                    return None
+                ok, result = connection.recv()
+            except (EOFError, OSError) as e:
+                if not self._cancelled:
+                    self.logger.error(f"Связь с процессом синтеза речи потеряна: {str(e)}")
+                    self._kill()
+                return None
+            finally:
+                self._busy = False
+            if not ok:
+                raise RuntimeError(result)
+            return result
+
+    def voices(self):
+        if self._voices is None:
+            self._voices = self._request("voices")
+        return self._voices or []
+
+    def set_volume(self, volume):
+        # Применяется к следующей фразе, чтобы не ждать окончания текущей
+        self.volume = volume
+
+    def say(self, text, voice_name, rate, volume):
+        volume = self.volume if volume is None else volume
+        self._request("say", (text, voice_name, rate, volume), self.REQUEST_TIMEOUT + len(text) * self.SECONDS_PER_CHAR)
+
+    def render(self, text, voice_name, rate, path):
+        self._request("render", (text, voice_name, rate, path),
+                      self.REQUEST_TIMEOUT + len(text) * self.SECONDS_PER_CHAR)
+
+    def stop(self):
+        """Прерывает текущую фразу; процесс будет запущен заново при следующем запросе"""
+        if self._busy:
+            self._cancelled = True
+            self._kill()
+            self.logger.debug("Текущая фраза прервана")
+
+    def close(self):
+        self._cancelled = True
+        with self.lock:
+            process, connection = self.process, self.connection
+        if process is None:
+            return
+        try:
+            connection.send(("exit", ()))
+        except OSError:
+            pass
+        process.join(1)
+        self._kill()
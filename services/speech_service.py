@@ -1,25 +1,72 @@
 # services/speech_service.py
-import pyttsx3
+import pygame
 import threading
+import time
+from collections import deque, OrderedDict
+from dataclasses import dataclass, field
 from utils.logger import Logger
+from utils.settings import Settings
+from utils.clip_cache import ClipCache
+from services.speech_process import Synthesizer, SpeechProcess
+
+@dataclass
+class Utterance:
+    text: str
+    voice_name: str = None
+    rate: int = None
+    volume: float = None
+    summary: str = None  # Шаблон с @names для объединения однотипных фраз; None - фраза не объединяется
+    names: list = field(default_factory=list)  # Имена пользователей, упомянутых во фразе
+
+    @property
+    def group(self):
+        return self.summary, self.voice_name, self.rate, self.volume
 
 class SpeechService:
-    def __init__(self):
+    # Сколько имен перечисляется в объединенной фразе, остальные считаются числом
+    SUMMARY_NAMES = 2
+    # Сколько ключей уже звучавших фраз помнится для решения, стоит ли сохранять фразу в кэш
+    SEEN_PHRASES = 5000
+
+    def __init__(self, settings=None):
         self.logger = Logger().get_logger('SpeechService')
         self.logger.info("Инициализация сервиса синтеза речи")
+        self.settings = settings or Settings()
         
-        self.engine = pyttsx3.init()
-        self.engine.setProperty('rate', 180)  # Скорость речи по умолчанию
+        if self.settings.speech_out_of_process:
+            # Зависание или падение движка не затрагивает основной процесс
+            self.synthesizer = SpeechProcess()
+        else:
+            self.synthesizer = Synthesizer()
         self.lock = threading.Lock()
+        # Очередь фраз обслуживает один поток, фразы произносятся в порядке поступления
+        self.queue = deque()
+        self.queue_condition = threading.Condition()
+        self.worker = None
+        # Фраза сохраняется в кэш при повторе, чтобы разовые комментарии не вытесняли
+        # из него шаблонные фразы о подключениях, лайках и подарках постоянных зрителей
+        self.clip_cache = ClipCache("speech_cache", self.settings.speech_cache_mb * 1024 * 1024)
+        self._seen_phrases = OrderedDict()
+        self._channel = None
         
+        self.voices_cache = []
+        if self.settings.speech_out_of_process:
+            # Процесс синтеза запускается и отдает список голосов в фоне: запуск окна не ждет канал
+            threading.Thread(target=self._load_voices, name="SpeechVoices", daemon=True).start()
+        else:
+            self._load_voices()
+
+    def _load_voices(self):
         self.voices_cache = self.get_voices()
         self.logger.debug(f"Доступные голоса: {', '.join(self.voices_cache)}")
     
     def get_voices(self):
-        """Возвращает список доступных голосов"""
+        """
+        Возвращает список доступных голосов. При синтезе в отдельном процессе может ждать
+        его запуска, поэтому из потока GUI вызывается через пул потоков
+        """
         try:
-            voices = self.engine.getProperty('voices')
-            voice_names = [voice.name for voice in voices]
+            voice_names = self.synthesizer.voices()
             self.logger.debug(f"Получен список голосов: {voice_names}")
             return voice_names
         except Exception as e:
@@ -31,59 +78,175 @@ class SpeechService:
         try:
             if 0.0 <= volume <= 1.0:
                 self.logger.debug(f"Установлена громкость: {volume}")
-                self.engine.setProperty('volume', volume)
+                self.synthesizer.set_volume(volume)
             else:
                 self.logger.warning("Громкость должна быть в диапазоне от 0.0 до 1.0")
         except Exception as e:
             self.logger.error(f"Ошибка при установке громкости: {str(e)}", exc_info=True)
 
     def stop(self):
-        """Останавливает текущий синтез речи"""
+        """Останавливает текущий синтез речи и отменяет ожидающие фразы"""
         try:
             self.logger.debug("Остановка синтеза речи")
-            self.engine.stop()
+            with self.queue_condition:
+                self.queue.clear()
+            if self._channel is not None:
+                self._channel.stop()
+            self.synthesizer.stop()
         except Exception as e:
             self.logger.error(f"Ошибка при остановке синтеза речи: {str(e)}", exc_info=True)
+
+    def close(self):
+        """Отменяет озвучивание и освобождает движок синтеза речи"""
+        self.stop()
+        try:
+            self.synthesizer.close()
+        except Exception as e:
+            self.logger.error(f"Ошибка при закрытии синтеза речи: {str(e)}", exc_info=True)
     
-    def speech(self, text, voice_name=None, rate=None, volume=None):
-        """Запускает синтез речи в отдельном потоке"""
+    def speech(self, text, voice_name=None, rate=None, volume=None, summary=None, name=None):
+        """
+        Ставит фразу в очередь синтеза речи. Если задан summary (шаблон с @names), при отставании
+        озвучивания от max_speech_latency ожидающие фразы с тем же шаблоном объединяются в одну
+        """
         try:
             self.logger.debug(f"Запрос на синтез речи: '{text}', голос: {voice_name}, скорость: {rate}, громкость: {volume}")
-            # Выполняем в отдельном потоке, чтобы не блокировать UI
-            thread = threading.Thread(target=self._speech_thread, args=(text, voice_name, rate, volume))
-            thread.daemon = True
-            thread.start()
+            utterance = Utterance(text, voice_name, rate, volume, summary, [name] if name else [])
+            with self.queue_condition:
+                self.queue.append(utterance)
+                self._limit_backlog()
+                if self.worker is None:
+                    # Выполняем в отдельном потоке, чтобы не блокировать UI
+                    self.worker = threading.Thread(target=self._speech_worker, daemon=True)
+                    self.worker.start()
+                self.queue_condition.notify()
         except Exception as e:
             self.logger.error(f"Ошибка при запуске синтеза речи: {str(e)}", exc_info=True)
+
+    @staticmethod
+    def _duration(utterance):
+        """Примерная длительность фразы в секундах: около 6 символов на слово"""
+        rate = 180 if utterance.rate is None else 150 + utterance.rate * 10
+        return len(utterance.text) * 10 / max(rate, 50)
+
+    def _backlog(self):
+        return sum(self._duration(utterance) for utterance in self.queue)
+
+    def _limit_backlog(self):
+        """
+        Держит задержку озвучивания в пределах max_speech_latency: сначала объединяет
+        однотипные фразы, затем, если этого мало, отбрасывает самые старые.
+        Вызывается под queue_condition
+        """
+        target = self.settings.max_speech_latency
+        if self._backlog() <= target:
+            return
+        merged = {}
+        queue = deque()
+        for utterance in self.queue:
+            if utterance.summary is None or not utterance.names:
+                queue.append(utterance)
+                continue
+            first = merged.get(utterance.group)
+            if first is None:
+                merged[utterance.group] = utterance
+                queue.append(utterance)
+            else:
+                # Объединенная фраза остается на месте первой из объединенных;
+                # повторно подключившийся или отправивший подарок зритель называется один раз
+                names = list(dict.fromkeys(first.names + utterance.names))
+                if len(names) > len(first.names):
+                    first.names = names
+                    first.text = first.summary.replace("@names", self._names_text(names))
+        self.logger.debug(f"Очередь речи сокращена объединением с {len(self.queue)} до {len(queue)} фраз")
+        self.queue = queue
+        dropped = 0
+        while len(self.queue) > 1 and self._backlog() > target:
+            self.queue.popleft()
+            dropped += 1
+        if dropped:
+            self.logger.warning(f"Озвучивание не успевает за событиями, пропущено фраз: {dropped}")
+
+    @classmethod
+    def _names_text(cls, names):
+        if len(names) == 1:
+            return names[0]
+        if len(names) <= cls.SUMMARY_NAMES + 1:
+            return f"{', '.join(names[:-1])} и {names[-1]}"
+        return f"{', '.join(names[:cls.SUMMARY_NAMES])} и еще {len(names) - cls.SUMMARY_NAMES}"
+
+    def _speech_worker(self):
+        """Поток озвучивания: по очереди произносит фразы"""
+        while True:
+            with self.queue_condition:
+                while not self.queue:
+                    self.queue_condition.wait()
+                utterance = self.queue.popleft()
+            self._speech_thread(utterance.text, utterance.voice_name, utterance.rate, utterance.volume)
     
     def _speech_thread(self, text, voice_name, rate, volume):
-        """Синтезирует речь в отдельном потоке"""
+        """
+        Произносит фразу: готовый файл из кэша воспроизводится микшером без синтеза,
+        повторная фраза сначала сохраняется в кэш, новая синтезируется напрямую
+        """
         with self.lock:  # Предотвращаем одновременное использование движка
             try:
-                if voice_name:
-                    voices = self.engine.getProperty('voices')
-                    voice_found = False
-                    for voice in voices:
-                        if voice.name == voice_name:
-                            self.logger.debug(f"Установлен голос: {voice_name}")
-                            self.engine.setProperty('voice', voice.id)
-                            voice_found = True
-                            break
-                    
-                    if not voice_found:
-                        self.logger.warning(f"Голос {voice_name} не найден, используется голос по умолчанию")
-                
-                if rate is not None:
-                    real_rate = 150 + (rate * 10)  # Преобразуем из -10..10 в 50..250
-                    self.logger.debug(f"Установлена скорость речи: {real_rate}")
-                    self.engine.setProperty('rate', real_rate)
-                
-                if volume is not None:
-                    self.set_volume(volume)
-                
-                self.engine.say(text)
+                # Громкость применяется при воспроизведении, поэтому файл общий для любой громкости
+                key = ClipCache.key(text, voice_name, rate)
+                path = self.clip_cache.get(key)
+                if path:
+                    if self._play_clip(key, path, volume):
+                        self.logger.debug(f"Фраза воспроизведена из кэша: '{text}'")
+                        return
+                elif self._seen_before(key):
+                    path = self._render_clip(key, text, voice_name, rate)
+                    if path and self._play_clip(key, path, volume):
+                        return
                 self.logger.debug(f"Добавлен текст для синтеза: '{text}'")
-                self.engine.runAndWait()
+                self.synthesizer.say(text, voice_name, rate, volume)
                 self.logger.debug("Синтез речи выполнен успешно")
             except Exception as e:
-                self.logger.error(f"Ошибка при синтезе речи: {str(e)}", exc_info=True)
\ No newline at end of file
+                self.logger.error(f"Ошибка при синтезе речи: {str(e)}", exc_info=True)
+
+    def _seen_before(self, key):
+        """Отмечает фразу как прозвучавшую; возвращает True, если она уже звучала"""
+        seen = self._seen_phrases.pop(key, False)
+        self._seen_phrases[key] = True
+        if len(self._seen_phrases) > self.SEEN_PHRASES:
+            self._seen_phrases.popitem(last=False)
+        return seen
+
+    def _render_clip(self, key, text, voice_name, rate):
+        """Синтезирует фразу в файл кэша; возвращает путь к файлу или None (под self.lock)"""
+        try:
+            self.synthesizer.render(text, voice_name, rate, self.clip_cache.partial_path(key))
+            path = self.clip_cache.add(key)
+            if path:
+                self.logger.debug(f"Фраза сохранена в кэш: '{text}'")
+            return path
+        except Exception as e:
+            self.logger.warning(f"Не удалось сохранить фразу в кэш: {str(e)}")
+            return None
+
+    def _play_clip(self, key, path, volume):
+        """Воспроизводит файл фразы через микшер и ждет окончания; возвращает False при ошибке"""
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            sound = pygame.mixer.Sound(path)
+            if volume is not None:
+                sound.set_volume(volume)
+            self._channel = sound.play()
+            if self._channel is None:
+                # Все каналы микшера заняты: фраза будет произнесена движком
+                self.logger.warning("Нет свободного канала для воспроизведения фразы из кэша")
+                return False
+            while self._channel.get_busy():
+                time.sleep(0.05)
+            return True
+        except Exception as e:
+            self.logger.warning(f"Не удалось воспроизвести фразу из кэша: {str(e)}")
+            self.clip_cache.discard(key)
+            return False
+        finally:
+            self._channel = None
@@ -0,0 +1,154 @@
+# services/stats_service.py
+import os
+import csv
+import heapq
+import threading
+from datetime import datetime
+from utils.logger import Logger
+from utils.settings import Settings
+from models.data_models import UserStats
+
+class Leaderboard:
+    """
+    Рейтинг пользователей по очкам на основе кучи с ленивым удалением устаревших записей:
+    обновление очков стоит O(log n), выборка топ-N - O((N + k) log n)
+    """
+    def __init__(self):
+        self._heap = []
+        self._scores = {}
+
+    def __len__(self):
+        return len(self._scores)
+
+    def update(self, key, score):
+        """Обновляет очки пользователя (кортеж, сравнивается лексикографически)"""
+        if self._scores.get(key) == score:
+            return
+        self._scores[key] = score
+        heapq.heappush(self._heap, (tuple(-value for value in score), key))
+        # Периодически перестраиваем кучу, чтобы устаревшие записи не копились
+        if len(self._heap) > 4 * len(self._scores) + 64:
+            self._heap = [(tuple(-value for value in s), k) for k, s in self._scores.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, n):
+        """Возвращает ключи N пользователей с наибольшими очками"""
+        result = []
+        valid = []
+        while self._heap and len(result) < n:
+            entry = heapq.heappop(self._heap)
+            negative_score, key = entry
+            # Запись устарела: очки пользователя с тех пор изменились или уже выданы
+            if key in result or self._scores.get(key) != tuple(-value for value in negative_score):
+                continue
+            result.append(key)
+            valid.append(entry)
+        for entry in valid:
+            heapq.heappush(self._heap, entry)
+        return result
+
+    def clear(self):
+        self._heap = []
+        self._scores = {}
+
+class StatsService:
+    """
+    Статистика пользователей за сессию мониторинга: подарки, алмазы, лайки, комментарии.
+    Обновляется из потока подключения, читается из GUI
+    """
+    EXPORT_DIR = "stats"
+
+    def __init__(self, settings=None):
+        self.logger = Logger().get_logger('StatsService')
+        self.logger.info("Инициализация сервиса статистики")
+        self.settings = settings or Settings()
+        self.lock = threading.Lock()
+        self.users = {}
+        self.leaderboard = Leaderboard()
+        self.stream = ""
+        self.started_at = datetime.now()
+
+    def reset(self, stream):
+        """Начинает статистику новой сессии"""
+        with self.lock:
+            self.users = {}
+            self.leaderboard.clear()
+            self.stream = stream
+            self.started_at = datetime.now()
+        self.logger.debug(f"Статистика сброшена для стрима {stream}")
+
+    def _get_user(self, user_id, nickname):
+        stats = self.users.get(user_id)
+        if stats is None:
+            stats = UserStats(user_id=user_id, nickname=nickname)
+            self.users[user_id] = stats
+        elif nickname:
+            stats.nickname = nickname
+        return stats
+
+    def record_gift(self, user_id, nickname, diamond_count, repeat_count=1):
+        """Учитывает подарок (для серий - один раз, с итоговым количеством)"""
+        with self.lock:
+            stats = self._get_user(user_id, nickname)
+            stats.gift_count += repeat_count
+            stats.diamonds += diamond_count * repeat_count
+            self.leaderboard.update(user_id, (stats.diamonds, stats.gift_count))
+
+    def record_like(self, user_id, nickname, count=1):
+        """Учитывает лайки пользователя"""
+        with self.lock:
+            self._get_user(user_id, nickname).likes += count
+
+    def record_comment(self, user_id, nickname):
+        """Учитывает комментарий пользователя"""
+        with self.lock:
+            self._get_user(user_id, nickname).comments += 1
+
+    def top_gifters(self, n=10):
+        """Возвращает N пользователей с наибольшей суммой алмазов"""
+        with self.lock:
+            return [UserStats(**vars(self.users[key])) for key in self.leaderboard.top(n)]
+
+    def get_user(self, user_id):
+        """Возвращает копию статистики пользователя"""
+        with self.lock:
+            stats = self.users.get(user_id)
+            return UserStats(**vars(stats)) if stats else None
+
+    def summary(self):
+        """Возвращает итоговые показатели сессии"""
+        with self.lock:
+            return {
+                "users": len(self.users),
+                "gifts": sum(stats.gift_count for stats in self.users.values()),
+                "diamonds": sum(stats.diamonds for stats in self.users.values()),
+                "likes": sum(stats.likes for stats in self.users.values()),
+                "comments": sum(stats.comments for stats in self.users.values()),
+            }
+
+    def export_csv(self, path=None):
+        """Сохраняет статистику всех пользователей сессии в CSV, по убыванию алмазов"""
+        try:
+            with self.lock:
+                if not self.users:
+                    return None
+                rows = sorted(self.users.values(), key=lambda s: (s.diamonds, s.gift_count), reverse=True)
+                rows = [UserStats(**vars(stats)) for stats in rows]
+                stream = self.stream
+                started_at = self.started_at
+            if path is None:
+                if not os.path.exists(self.EXPORT_DIR):
+                    os.makedirs(self.EXPORT_DIR)
+                safe_stream = "".join(c for c in stream if c.isalnum() or c in "._-") or "stream"
+                path = os.path.join(self.EXPORT_DIR, f"{safe_stream}_{started_at.strftime('%Y%m%d_%H%M%S')}.csv")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["user_id", "nickname", "diamonds", "gifts", "likes", "comments"])
+                for stats in rows:
+                    writer.writerow([stats.user_id, stats.nickname, stats.diamonds,
+                                     stats.gift_count, stats.likes, stats.comments])
+            self.logger.info(f"Статистика сессии сохранена в {path}")
+            return path
+        except Exception as e:
+            self.logger.error(f"Ошибка при экспорте статистики: {str(e)}", exc_info=True)
+            return None
@@ -0,0 +1,57 @@
+# services/trigger_service.py
+import os
+import json
+import threading
+from dataclasses import dataclass, asdict
+from utils.logger import Logger
+from utils.settings import Settings
+from utils.aho_corasick import PhraseMatcher
+
+@dataclass(frozen=True)
+class TriggerRule:
+    phrase: str  # Слово или фраза в комментарии (без учета регистра, целыми словами)
+    sound: str = ""  # Звук из assets
+    speech: str = ""  # Текст для озвучивания (@name - имя пользователя, @comment - комментарий)
+    highlight: bool = False  # Выделить строку комментария
+
+class TriggerService:
+    """
+    Реакции на ключевые слова и фразы в комментариях. Правила хранятся здесь,
+    а проверяет их RuleEngine: после изменения правил он перекомпилирует свою таблицу
+    """
+    def __init__(self, settings=None):
+        self.logger = Logger().get_logger('TriggerService')
+        self.logger.info("Инициализация сервиса триггеров")
+        self.settings = settings or Settings()
+        self.store_name = "triggers.json"
+        self.lock = threading.Lock()
+        # Обработчики, вызываемые после изменения правил
+        self.listeners = []
+        rules = []
+        if os.path.exists(self.store_name):
+            try:
+                with open(self.store_name, 'r', encoding='utf-8') as f:
+                    rules = [TriggerRule(**rule) for rule in json.load(f)]
+                self.logger.debug(f"Загружено {len(rules)} триггеров из {self.store_name}")
+            except Exception as e:
+                self.logger.error(f"Ошибка при загрузке триггеров: {str(e)}", exc_info=True)
+        # Кортеж заменяется одной ссылкой, поэтому чтение не требует блокировки
+        self._rules = tuple(rules)
+
+    def rules(self):
+        """Возвращает текущий список правил"""
+        return list(self._rules)
+
+    def set_rules(self, rules):
+        """Заменяет правила, сохраняет их в файл и оповещает слушателей"""
+        rules = [rule for rule in rules if PhraseMatcher.normalize(rule.phrase)]
+        with self.lock:
+            self._rules = tuple(rules)
+            try:
+                with open(self.store_name, 'w', encoding='utf-8') as f:
+                    json.dump([asdict(rule) for rule in rules], f, ensure_ascii=False, indent=2)
+                self.logger.info(f"Сохранено {len(rules)} триггеров")
+            except Exception as e:
+                self.logger.error(f"Ошибка при сохранении триггеров: {str(e)}", exc_info=True)
+        for listener in self.listeners:
+            listener()
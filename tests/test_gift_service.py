@@ -0,0 +1,109 @@
+# tests/test_gift_service.py
+import asyncio
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from services.gift_service import GiftService
+
+URL = "https://images.example.com/gift.png"
+
+class _Response:
+    def __init__(self, status):
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def read(self):
+        return b""
+
+class _Session:
+    """Сессия aiohttp, отвечающая заданным HTTP-статусом без обращения к сети"""
+    def __init__(self, status):
+        self.status = status
+        self.requests = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def get(self, url):
+        self.requests += 1
+        if self.status is None:
+            raise asyncio.TimeoutError()
+        return _Response(self.status)
+
+class GiftServiceBreakerTest(unittest.TestCase):
+    def setUp(self):
+        # Отдельный экземпляр в пустой папке: без синглтона, gifts.json и настроек пользователя
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.service = object.__new__(GiftService)
+        self.service._initialize(SimpleNamespace(keep_original_gift_images=False))
+        self.service.error_handler = mock.Mock()
+        self.service.BREAKER_RESET_TIMEOUT = 0
+        # Цепь размыкается после серии ошибок сервера и сразу переходит к пробному запросу
+        for gift_id in range(self.service.BREAKER_THRESHOLD):
+            self.service._record_failure(str(gift_id), URL, True)
+        self.breaker = self.service._breakers["images.example.com"]
+        self.assertTrue(self.breaker.is_open)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def is_blocked(self, gift_id):
+        with self.service.lock:
+            return self.service._is_blocked(str(gift_id), URL)
+
+    def test_client_error_during_trial_closes_breaker(self):
+        # Пробный запрос получает 404: хост ответил, поэтому цепь замыкается
+        self.assertFalse(self.is_blocked(100))
+        self.service._session = _Session(404)
+        with self.service.lock:
+            self.assertTrue(self.service._claim("100", None))
+        self.assertIsNone(asyncio.run(self.service._download(100, "Роза", URL)))
+        self.assertFalse(self.breaker.is_open)
+        self.assertFalse(self.breaker.trial_in_progress)
+        # Изображение с ошибкой 4xx не запрашивается повторно, другие подарки загружаются
+        self.assertTrue(self.is_blocked(100))
+        self.assertFalse(self.is_blocked(101))
+
+    def test_server_error_during_trial_reopens_breaker(self):
+        self.assertFalse(self.is_blocked(100))
+        self.service._session = _Session(503)
+        with self.service.lock:
+            self.service._claim("100", None)
+        asyncio.run(self.service._download(100, "Роза", URL))
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.trial_in_progress)
+
+    def test_timeout_in_create_counts_as_host_failure(self):
+        # Таймаут пробного запроса снова размыкает цепь, а не отменяет пробу
+        session = _Session(None)
+        with mock.patch("services.gift_service.aiohttp.ClientSession", return_value=session):
+            self.assertIsNone(asyncio.run(self.service.create(100, "Роза", URL)))
+        self.assertEqual(session.requests, 1)
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.trial_in_progress)
+        self.service.error_handler.show_error_dialog.assert_not_called()
+
+    def test_rejected_claim_releases_trial(self):
+        # Подарок уже загружается: повторный запрос не должен занять пробный запрос к хосту
+        with self.service.lock:
+            self.service._claim("100", None)
+        self.service.fetch_async(100, "Роза", URL)
+        self.assertFalse(self.breaker.trial_in_progress)
+        self.assertFalse(self.is_blocked(101))
+        self.assertTrue(self.is_blocked(102))
+
+if __name__ == '__main__':
+    unittest.main()
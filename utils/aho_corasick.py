@@ -0,0 +1,84 @@
+# utils/aho_corasick.py
+from collections import deque
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасик: находит все вхождения набора строк за один проход по тексту.
+    Время поиска зависит от длины текста и числа найденных вхождений, но не от числа строк.
+    Автомат неизменяем после построения, поэтому его можно читать из нескольких потоков
+    """
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        self._lengths = [len(pattern) for pattern in patterns]
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                node = next_node
+            self._output[node] += (index,)
+        # Суффиксные ссылки строятся обходом в ширину: у более коротких префиксов они уже готовы
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, next_node in self._goto[node].items():
+                queue.append(next_node)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_node] = self._goto[fail].get(char, 0)
+                self._output[next_node] += self._output[self._fail[next_node]]
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def iter(self, text):
+        """Возвращает тройки (начало, конец, номер строки) для всех вхождений в text"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in output[node]:
+                yield position - self._lengths[index] + 1, position + 1, index
+
+class PhraseMatcher:
+    """
+    Поиск набора фраз в тексте целыми словами, без учета регистра и лишних пробелов
+    """
+    def __init__(self, phrases):
+        self.automaton = AhoCorasick([self.normalize(phrase) for phrase in phrases])
+
+    def __len__(self):
+        return len(self.automaton)
+
+    @staticmethod
+    def normalize(text):
+        return " ".join(text.casefold().split())
+
+    def match(self, text):
+        """Возвращает номера найденных фраз в порядке их первого вхождения"""
+        if not text or not len(self.automaton):
+            return []
+        text = self.normalize(text)
+        matched = []
+        seen = set()
+        for start, end, index in self.automaton.iter(text):
+            if index in seen:
+                continue
+            if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                seen.add(index)
+                matched.append(index)
+        return matched
@@ -0,0 +1,51 @@
+# utils/audio_utils.py
+import math
+import sys
+import wave
+from array import array
+import pygame
+
+# Целевая громкость звуков (RMS, дБ относительно полной шкалы)
+TARGET_LOUDNESS_DBFS = -20.0
+# Запас до максимальной амплитуды при усилении тихих звуков
+PEAK_HEADROOM = 0.95
+
+def transcode_for_mixer(source_path, destination_path, max_seconds=None):
+    """
+    Декодирует звук (mp3, wav, ogg) в PCM с частотой и числом каналов микшера pygame
+    и записывает его в WAV: при воспроизведении файл не нужно ни декодировать, ни пересэмплировать.
+    Тихий звук усиливается в самих отсчетах (не выше PEAK_HEADROOM от полной шкалы),
+    для громкого возвращается коэффициент громкости воспроизведения <= 1.0,
+    так что все звуки звучат примерно на уровне TARGET_LOUDNESS_DBFS.
+    Возвращает (коэффициент громкости, длительность в секундах).
+    Выбрасывает ValueError, если файл пустой, беззвучный или слишком длинный.
+    Микшер должен быть инициализирован; функцию можно вызывать из фоновых потоков
+    """
+    frequency, sample_format, channels = pygame.mixer.get_init()
+    if sample_format != -16:
+        raise ValueError(f"Неподдерживаемый формат микшера: {sample_format}")
+    # Отсчеты микшера в порядке байтов платформы, как и у array
+    samples = array('h', pygame.mixer.Sound(source_path).get_raw())
+    duration = len(samples) / channels / frequency
+    if not samples:
+        raise ValueError("Файл не содержит звука")
+    if max_seconds is not None and duration > max_seconds:
+        raise ValueError(f"Звук слишком длинный: {duration:.1f} с (не больше {max_seconds} с)")
+    peak = max(max(samples), -min(samples))
+    rms = math.sqrt(math.fsum(sample * sample for sample in samples) / len(samples))
+    if not peak or not rms:
+        raise ValueError("Файл содержит только тишину")
+    gain = 32768 * 10 ** (TARGET_LOUDNESS_DBFS / 20) / rms
+    boost = min(gain, PEAK_HEADROOM * 32767 / peak)
+    if boost > 1.0:
+        samples = array('h', (int(sample * boost) for sample in samples))
+        gain /= boost
+    if sys.byteorder == 'big':
+        # WAV хранит отсчеты в порядке little-endian
+        samples.byteswap()
+    with wave.open(destination_path, 'wb') as output:
+        output.setnchannels(channels)
+        output.setsampwidth(2)
+        output.setframerate(frequency)
+        output.writeframes(samples.tobytes())
+    return min(gain, 1.0), duration
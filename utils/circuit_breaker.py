@@ -0,0 +1,49 @@
+# utils/circuit_breaker.py
+import time
+
+class CircuitBreaker:
+    """
+    Размыкатель цепи для внешнего сервиса: после failure_threshold ошибок подряд запросы
+    блокируются на reset_timeout секунд, затем пропускается один пробный запрос.
+    Успешный пробный запрос замыкает цепь, неудачный - снова размыкает ее;
+    каждый разрешенный пробный запрос должен закончиться одним из record_success,
+    record_failure или release_trial.
+    Не потокобезопасен: вызывающий код сам защищает его блокировкой
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        """Проверяет, можно ли выполнить запрос"""
+        if self.opened_at is None:
+            return True
+        if not self.trial_in_progress and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.trial_in_progress = True
+            return True
+        return False
+
+    def release_trial(self):
+        """Отменяет пробный запрос, разрешенный allow(), но так и не выполненный"""
+        self.trial_in_progress = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+
+    def record_failure(self):
+        """Учитывает ошибку; возвращает True, если цепь только что разомкнулась"""
+        self.failures += 1
+        self.trial_in_progress = False
+        was_open = self.opened_at is not None
+        if was_open or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        return not was_open and self.opened_at is not None
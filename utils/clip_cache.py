@@ -0,0 +1,97 @@
+# utils/clip_cache.py
+import hashlib
+import os
+from collections import OrderedDict
+from utils.logger import Logger
+
+class ClipCache:
+    """
+    Кэш аудиофайлов на диске с вытеснением давно не использованных файлов,
+    когда суммарный размер превышает max_bytes. Порядок использования сохраняется
+    во времени изменения файлов и восстанавливается при запуске.
+    Не потокобезопасен: вызывающий код сам защищает его блокировкой
+    """
+    PARTIAL_SUFFIX = ".part"
+
+    def __init__(self, directory, max_bytes, extension=".wav"):
+        self.logger = Logger().get_logger('ClipCache')
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.index = OrderedDict()  # ключ -> размер файла, давно использованные в начале
+        self.total_bytes = 0
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            for file_name in os.listdir(self.directory):
+                path = os.path.join(self.directory, file_name)
+                if file_name.endswith(self.PARTIAL_SUFFIX + self.extension):
+                    # Файл, запись которого была прервана
+                    os.remove(path)
+                elif file_name.endswith(self.extension):
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, file_name[:-len(self.extension)], stat.st_size))
+            for _, key, size in sorted(entries):
+                self.index[key] = size
+                self.total_bytes += size
+            self.logger.debug(f"В кэше {self.directory} {len(self.index)} файлов, {self.total_bytes} байт")
+            self._evict()
+        except Exception as e:
+            self.logger.error(f"Ошибка при чтении кэша {self.directory}: {str(e)}", exc_info=True)
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha1("\x1f".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def partial_path(self, key):
+        """Путь для записи нового файла; add() переносит его на место атомарно"""
+        return os.path.join(self.directory, key + self.PARTIAL_SUFFIX + self.extension)
+
+    def get(self, key):
+        """Возвращает путь к файлу и отмечает его использование или None, если файла нет"""
+        if key not in self.index:
+            return None
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.discard(key)
+            return None
+        self.index.move_to_end(key)
+        return path
+
+    def add(self, key):
+        """Переносит записанный по partial_path(key) файл в кэш; возвращает путь или None"""
+        partial_path = self.partial_path(key)
+        try:
+            size = os.path.getsize(partial_path)
+            if not size:
+                os.remove(partial_path)
+                return None
+            os.replace(partial_path, self.path(key))
+        except OSError as e:
+            self.logger.warning(f"Не удалось добавить файл в кэш: {str(e)}")
+            return None
+        self.total_bytes += size - self.index.pop(key, 0)
+        self.index[key] = size
+        self._evict()
+        return self.path(key) if key in self.index else None
+
+    def discard(self, key):
+        size = self.index.pop(key, None)
+        if size is None:
+            return
+        self.total_bytes -= size
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while self.index and self.total_bytes > self.max_bytes:
+            key = next(iter(self.index))
+            self.discard(key)
+            self.logger.debug(f"Из кэша {self.directory} вытеснен файл {key}")
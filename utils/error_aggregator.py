@@ -0,0 +1,87 @@
+# utils/error_aggregator.py
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Optional
+
+@dataclass
+class ErrorRecord:
+    title: str
+    message: str
+    details: Optional[str]
+    count: int
+    first_seen: datetime
+    last_seen: datetime
+
+class ErrorAggregator:
+    """
+    Журнал ошибок, сгруппированных по сигнатуре (заголовок + текст без чисел), с ограничением
+    частоты уведомлений пользователя. Безопасен для вызова из любого потока
+    """
+    # Сколько различных ошибок хранится в журнале
+    MAX_RECORDS = 200
+    # Не чаще одного уведомления об одной и той же ошибке за этот интервал (с)
+    NOTIFY_COOLDOWN = 60
+    # Не больше стольких уведомлений о любых ошибках в минуту
+    MAX_NOTIFICATIONS_PER_MINUTE = 3
+
+    _NUMBER_PATTERN = re.compile(r"\d+")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = OrderedDict()  # сигнатура -> ErrorRecord, последние в конце
+        self.version = 0
+        self._last_notified = {}  # сигнатура -> время последнего уведомления
+        self._notifications = deque()  # время последних уведомлений
+
+    @classmethod
+    def signature(cls, title, message):
+        # ID подарков, коды и счетчики не должны разделять одну и ту же ошибку на разные
+        return title, cls._NUMBER_PATTERN.sub("#", message)
+
+    def report(self, title, message, details=None, can_notify=True):
+        """
+        Учитывает ошибку в журнале. Возвращает True, если о ней стоит уведомить пользователя.
+        can_notify=False - уведомление невозможно (например, вызов не из потока GUI),
+        такая ошибка не расходует лимит уведомлений
+        """
+        key = self.signature(title, message)
+        now = time.monotonic()
+        with self.lock:
+            record = self.records.pop(key, None)
+            if record is None:
+                record = ErrorRecord(title, message, details, 0, datetime.now(), datetime.now())
+            record.count += 1
+            record.message = message
+            record.details = details
+            record.last_seen = datetime.now()
+            self.records[key] = record
+            while len(self.records) > self.MAX_RECORDS:
+                old_key, _ = self.records.popitem(last=False)
+                self._last_notified.pop(old_key, None)
+            self.version += 1
+            if not can_notify:
+                return False
+
+            while self._notifications and now - self._notifications[0] >= 60:
+                self._notifications.popleft()
+            last = self._last_notified.get(key)
+            if (last is not None and now - last < self.NOTIFY_COOLDOWN) \
+                    or len(self._notifications) >= self.MAX_NOTIFICATIONS_PER_MINUTE:
+                return False
+            self._last_notified[key] = now
+            self._notifications.append(now)
+            return True
+
+    def snapshot(self):
+        """Возвращает (версия журнала, копии записей от новых к старым)"""
+        with self.lock:
+            return self.version, [replace(record) for record in reversed(self.records.values())]
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+            self.version += 1
@@ -1,7 +1,9 @@
 import traceback
 import sys
-from PyQt6.QtWidgets import QMessageBox
+from PyQt6.QtWidgets import QMessageBox, QApplication
+from PyQt6.QtCore import QThread
 from utils.logger import Logger
+from utils.error_aggregator import ErrorAggregator
 
 class ErrorHandler:
     _instance = None
@@ -18,10 +20,22 @@ class ErrorHandler:
         """
         self.logger = Logger().get_logger('ErrorHandler')
         self.logger.info("Инициализация обработчика ошибок")
+        # Все ошибки попадают в журнал; модальный диалог показывается только для первых
+        # повторов в потоке GUI, остальные видны в ленте ошибок главного окна
+        self.aggregator = ErrorAggregator()
         
         # Устанавливаем глобальный обработчик исключений
         sys.excepthook = self.handle_global_exception
     
+    def _should_show_dialog(self, title, message, details=None):
+        """
+        Регистрирует ошибку в журнале и решает, показывать ли модальный диалог: только из потока GUI
+        и не чаще, чем позволяет ограничение частоты уведомлений
+        """
+        app = QApplication.instance()
+        on_gui_thread = app is not None and QThread.currentThread() == app.thread()
+        return self.aggregator.report(title, message, details, can_notify=on_gui_thread)
+
     def handle_global_exception(self, exc_type, exc_value, exc_traceback):
         """
         Обрабатывает необработанные исключения в приложении
@@ -52,7 +66,8 @@ class ErrorHandler:
             self.logger.error(f"Сетевая ошибка{operation_str}: {error_str}")
             
             message = f"Произошла сетевая ошибка{operation_str}.\n\n{error_str}"
-            QMessageBox.warning(parent_widget, "Ошибка сети", message)
+            if self._should_show_dialog("Ошибка сети", message):
+                QMessageBox.warning(parent_widget, "Ошибка сети", message)
             
             # Возвращаем False чтобы вызывающий код мог проверить успешность операции
             return False
@@ -78,7 +93,8 @@ class ErrorHandler:
                 suggestion = "\n\nДоступ к стриму запрещен. Возможно, это приватный стрим."
             
             message = f"Ошибка при взаимодействии с TikTok API:\n{error_str}{suggestion}"
-            QMessageBox.warning(parent_widget, "Ошибка TikTok API", message)
+            if self._should_show_dialog("Ошибка TikTok API", message):
+                QMessageBox.warning(parent_widget, "Ошибка TikTok API", message)
             
             return False
         except Exception as e:
@@ -105,7 +121,8 @@ class ErrorHandler:
                 suggestion = "\n\nНедостаточно свободного места на диске."
             
             message = f"Ошибка при работе с файлом{file_info}:\n{error_str}{suggestion}"
-            QMessageBox.warning(parent_widget, "Ошибка файловой операции", message)
+            if self._should_show_dialog("Ошибка файловой операции", message):
+                QMessageBox.warning(parent_widget, "Ошибка файловой операции", message)
             
             return False
         except Exception as e:
@@ -131,6 +148,8 @@ class ErrorHandler:
         """
         try:
             self.logger.error(f"{title}: {message}")
+            if not self._should_show_dialog(title, message, details):
+                return
             
             msg_box = QMessageBox(parent_widget)
             msg_box.setIcon(QMessageBox.Icon.Critical)
@@ -0,0 +1,21 @@
+# utils/image_utils.py
+from PyQt6.QtCore import QBuffer, QIODevice, Qt
+from PyQt6.QtGui import QImage
+
+def make_thumbnail(data, size, image_format="PNG"):
+    """
+    Декодирует изображение, вписывает его в квадрат size x size и кодирует заново.
+    Возвращает байты миниатюры или None, если изображение не удалось прочитать.
+    QImage не требует потока GUI, поэтому функцию можно вызывать из фоновых потоков
+    """
+    image = QImage()
+    if not image.loadFromData(data):
+        return None
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    if not image.save(buffer, image_format):
+        return None
+    return bytes(buffer.data())
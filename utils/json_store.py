@@ -0,0 +1,90 @@
+# utils/json_store.py
+import json
+import os
+import threading
+from utils.logger import Logger
+
+class JsonStore:
+    """
+    Словарь, сохраняемый в JSON-файл с отложенной записью. Изменение создает новую копию
+    словаря и подменяет ссылку на нее, поэтому чтение не требует блокировки и никогда
+    не видит словарь в процессе изменения. Изменения, сделанные за save_delay секунд,
+    записываются в файл одним разом в фоновом потоке; файл заменяется атомарно
+    """
+    def __init__(self, path, save_delay=2.0):
+        self.logger = Logger().get_logger('JsonStore')
+        self.path = path
+        self.save_delay = save_delay
+        self.lock = threading.Lock()  # Защищает изменение словаря и таймер записи
+        self.save_lock = threading.Lock()  # Не дает двум записям файла пересечься
+        self._timer = None
+        self._data = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except Exception as e:
+                self.logger.error(f"Ошибка при загрузке {self.path}: {str(e)}", exc_info=True)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def snapshot(self):
+        """Возвращает текущий словарь; его нельзя изменять"""
+        return self._data
+
+    def set(self, key, value):
+        """Изменяет значение и планирует запись; возвращает False, если значение не изменилось"""
+        with self.lock:
+            if key in self._data and self._data[key] == value:
+                return False
+            data = dict(self._data)
+            data[key] = value
+            self._data = data
+            self._schedule_save()
+        return True
+
+    def remove(self, key):
+        with self.lock:
+            if key not in self._data:
+                return False
+            data = dict(self._data)
+            del data[key]
+            self._data = data
+            self._schedule_save()
+        return True
+
+    def _schedule_save(self):
+        # Вызывается под self.lock
+        if self._timer is None:
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Записывает отложенные изменения в файл"""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        with self.save_lock:
+            # Словарь читается под save_lock: запись, начатая позже, всегда сохраняет более новые данные
+            data = self._data
+            partial_path = self.path + ".part"
+            try:
+                with open(partial_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(partial_path, self.path)
+                self.logger.debug(f"Сохранено {len(data)} записей в {self.path}")
+            except Exception as e:
+                self.logger.error(f"Ошибка при сохранении {self.path}: {str(e)}", exc_info=True)
+
+    def close(self):
+        """Сохраняет отложенные изменения, если они есть"""
+        with self.lock:
+            pending = self._timer is not None
+        if pending:
+            self.flush()
@@ -3,26 +3,24 @@ import logging
 from logging.handlers import RotatingFileHandler
 import sys
 import locale
-import aiofiles
-import asyncio
 from utils.settings import Settings
 
 class Logger:
     _instance = None
     
-    def __new__(cls):
+    def __new__(cls, settings=None, log_file="app.log"):
         if cls._instance is None:
             cls._instance = super(Logger, cls).__new__(cls)
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                loop.create_task(cls._instance._initialize_logger())
-            else:
-                asyncio.run(cls._instance._initialize_logger())
+            # Настройки передаются явно (или загружаются синхронно), поэтому
+            # логгер готов сразу после создания - без ожидания и гонок.
+            # Дочерние процессы передают свой log_file: ротация файла, открытого
+            # несколькими процессами, на Windows невозможна
+            cls._instance._initialize_logger(settings or Settings(), log_file)
         return cls._instance
     
-    async def _initialize_logger(self):
+    def _initialize_logger(self, settings, log_file):
         # Логирование информации о системе и кодировках
-        await self._log_system_info()
+        self._log_system_info()
         
         # Создаем директорию для логов, если её нет
         log_dir = "logs"
@@ -35,7 +33,7 @@ class Logger:
         
         # Настраиваем логирование в файл с ротацией с явным указанием UTF-8
         file_handler = RotatingFileHandler(
-            os.path.join(log_dir, "app.log"), 
+            os.path.join(log_dir, log_file), 
             maxBytes=10*1024*1024,  # 10 МБ
             backupCount=5,
             encoding='utf-8'
@@ -43,7 +41,6 @@ class Logger:
         file_handler.setFormatter(formatter)
         
         # Получаем уровень логирования из настроек
-        settings = await self._get_settings()
         logging_level = getattr(logging, settings.logging_level.upper(), logging.DEBUG)
         file_handler.setLevel(logging_level)
         
@@ -86,8 +83,8 @@ class Logger:
             
         except Exception as e:
             # В случае ошибки при настройке консоли, логируем это в файл
-            async with aiofiles.open(os.path.join(log_dir, "console_error.log"), "w", encoding="utf-8") as f:
-                await f.write(f"Ошибка при настройке консольного логирования: {str(e)}")
+            with open(os.path.join(log_dir, "console_error.log"), "w", encoding="utf-8") as f:
+                f.write(f"Ошибка при настройке консольного логирования: {str(e)}")
         
         # Предотвращаем дублирование логов
         root_logger.propagate = False
@@ -98,16 +95,7 @@ class Logger:
         # Логируем завершение инициализации
         root_logger.info("Логгер инициализирован успешно")
 
-    async def _get_settings(self):
-        """
-        Получает настройки с ожиданием их инициализации
-        """
-        settings = Settings()
-        while not hasattr(settings, 'logging_level'):
-            await asyncio.sleep(0.1)
-        return settings
-    
-    async def _log_system_info(self):
+    def _log_system_info(self):
         """
         Логирует информацию о системе и кодировках для диагностики
         """
@@ -128,14 +116,14 @@ class Logger:
                 os.makedirs(log_dir)
                 
             # Записываем информацию в отдельный файл
-            async with aiofiles.open(os.path.join(log_dir, "system_info.log"), "w", encoding="utf-8") as f:
-                await f.write("\n".join(info))
+            with open(os.path.join(log_dir, "system_info.log"), "w", encoding="utf-8") as f:
+                f.write("\n".join(info))
                 
         except Exception as e:
             # В случае ошибки, пишем в стандартный диагностический файл
             try:
-                async with aiofiles.open("logger_init_error.log", "w", encoding="utf-8") as f:
-                    await f.write(f"Ошибка при логировании системной информации: {str(e)}")
+                with open("logger_init_error.log", "w", encoding="utf-8") as f:
+                    f.write(f"Ошибка при логировании системной информации: {str(e)}")
             except:
                 pass
     
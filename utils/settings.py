@@ -2,7 +2,6 @@
 import json
 import os
 import aiofiles
-import asyncio
 
 class Settings:
     _instance = None
@@ -10,20 +9,23 @@ class Settings:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(Settings, cls).__new__(cls)
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                loop.create_task(cls._instance._load_settings())
-            else:
-                asyncio.run(cls._instance._load_settings())
+            # Загружаем синхронно: к моменту возврата объект полностью инициализирован
+            cls._instance._load_settings()
         return cls._instance
     
-    async def _load_settings(self):
+    def _load_settings(self):
+        """
+        Однократно читает settings.json и заполняет значения по умолчанию
+        """
         self.settings_file = "settings.json"
+        settings = {}
         if os.path.exists(self.settings_file):
-            async with aiofiles.open(self.settings_file, 'r', encoding='utf-8') as f:
-                settings = json.loads(await f.read())
-        else:
-            settings = {}
+            try:
+                with open(self.settings_file, 'r', encoding='utf-8') as f:
+                    settings = json.load(f)
+            except (OSError, ValueError) as e:
+                # Логгер ещё не настроен (он сам зависит от настроек), поэтому пишем в консоль
+                print(f"Не удалось прочитать {self.settings_file}, используются значения по умолчанию: {e}")
             
         # Установка значений по умолчанию
         self.user_id = settings.get("user_id", "")
@@ -39,6 +41,14 @@ class Settings:
         self.like_text = settings.get("like_text", "@name поставил лайк")
         self.logging_level = settings.get("logging_level", "DEBUG")  # Добавлен параметр уровня логирования
         self.saved_user_ids = settings.get("saved_user_ids", [])  # Добавлен параметр для сохраненных ID стримов
+        self.history_enabled = settings.get("history_enabled", True)  # Сохранение истории событий на диск
+        self.prefetch_gifts = settings.get("prefetch_gifts", True)  # Загрузка каталога подарков при подключении
+        self.keep_original_gift_images = settings.get("keep_original_gift_images", False)  # Хранить исходные изображения подарков
+        self.spam_rate_per_minute = settings.get("spam_rate_per_minute", 10)  # Сообщений пользователя в минуту до отключения озвучивания
+        self.spam_burst = settings.get("spam_burst", 5)  # Сообщений пользователя подряд до отключения озвучивания
+        self.max_speech_latency = settings.get("max_speech_latency", 10)  # Допустимое отставание озвучивания (с)
+        self.speech_cache_mb = settings.get("speech_cache_mb", 50)  # Размер кэша озвученных фраз на диске (МБ)
+        self.speech_out_of_process = settings.get("speech_out_of_process", False)  # Синтез речи в отдельном процессе
     
     async def save(self):
         settings = {
@@ -54,7 +64,15 @@ class Settings:
             "join_text": self.join_text,
             "like_text": self.like_text,
             "logging_level": self.logging_level,
-            "saved_user_ids": self.saved_user_ids
+            "saved_user_ids": self.saved_user_ids,
+            "history_enabled": self.history_enabled,
+            "prefetch_gifts": self.prefetch_gifts,
+            "keep_original_gift_images": self.keep_original_gift_images,
+            "spam_rate_per_minute": self.spam_rate_per_minute,
+            "spam_burst": self.spam_burst,
+            "max_speech_latency": self.max_speech_latency,
+            "speech_cache_mb": self.speech_cache_mb,
+            "speech_out_of_process": self.speech_out_of_process
         }
         
         async with aiofiles.open(self.settings_file, 'w', encoding='utf-8') as f:
@@ -0,0 +1,61 @@
+# utils/spam_filter.py
+import time
+from collections import OrderedDict
+
+class SpamFilter:
+    """
+    Защита от спама одного пользователя: у каждого пользователя свое ведро токенов
+    (burst событий подряд, затем rate_per_minute событий в минуту), а недавние сообщения
+    хранятся по хэшу текста, чтобы одинаковые сообщения объединялись в одну строку.
+    Обе таблицы ограничены по размеру и вытесняют давно не использованные записи.
+    Не потокобезопасен: используется только из потока подключения
+    """
+    # Сколько пользователей и сообщений хранится одновременно
+    MAX_USERS = 5000
+    MAX_MESSAGES = 2000
+    # Повтор сообщения позже этого интервала (с) добавляется новой строкой
+    REPEAT_WINDOW = 60
+
+    def __init__(self, rate_per_minute=10, burst=5):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._buckets = OrderedDict()  # пользователь -> [токены, время пополнения]
+        self._messages = OrderedDict()  # (тип события, пользователь, хэш текста) -> (строка, время)
+
+    def allow(self, user_id, now=None):
+        """Расходует токен пользователя; возвращает False, если пользователь превысил лимит"""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.pop(user_id, None)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+        else:
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        self._buckets[user_id] = bucket
+        if len(self._buckets) > self.MAX_USERS:
+            self._buckets.popitem(last=False)
+        if bucket[0] < 1.0:
+            return False
+        bucket[0] -= 1.0
+        return True
+
+    @staticmethod
+    def _key(item, text):
+        # Хранится только хэш текста: память не зависит от длины сообщений
+        return item.event_type, item.user_id, hash(" ".join(text.casefold().split()))
+
+    def repeat_of(self, item, now=None):
+        """Возвращает строку того же сообщения пользователя за последние REPEAT_WINDOW секунд или None"""
+        now = time.monotonic() if now is None else now
+        entry = self._messages.get(self._key(item, item.event))
+        if entry is None or now - entry[1] > self.REPEAT_WINDOW:
+            return None
+        return entry[0]
+
+    def remember(self, item, text, now=None):
+        """Запоминает строку item как последнюю строку сообщения text"""
+        key = self._key(item, text)
+        self._messages.pop(key, None)
+        self._messages[key] = (item, time.monotonic() if now is None else now)
+        if len(self._messages) > self.MAX_MESSAGES:
+            self._messages.popitem(last=False)
@@ -0,0 +1,53 @@
+# utils/speech_text.py
+import re
+import unicodedata
+from functools import lru_cache
+
+# Ник длиннее этого обрезается по границе слова
+MAX_NICKNAME_LENGTH = 24
+# Чем заменяется ник, в котором не осталось произносимых символов
+DEFAULT_NICKNAME = "зритель"
+
+# Три и более одинаковых буквы подряд ("Приииивет", "xxxx"); числа не сокращаются
+_REPEAT_PATTERN = re.compile(r"([^\d])\1{2,}")
+
+def _is_latin_or_cyrillic(char):
+    return char.isascii() or unicodedata.name(char, "").startswith(("LATIN", "CYRILLIC"))
+
+def _speakable_chars(text):
+    base = ""
+    for char in text:
+        category = unicodedata.category(char)
+        if category[0] in "LN":
+            base = char
+            yield char
+        elif category[0] == "M":
+            # Зачеркивания и надстрочные знаки поверх латиницы и кириллицы ("D̷a̷r̷k̷") не произносятся;
+            # в других письменностях (деванагари, арабская, тайская) знаки - часть слова
+            if category == "Mc" or not _is_latin_or_cyrillic(base):
+                yield char
+        else:
+            # Эмодзи, символы, знаки препинания, модификаторы и служебные символы не произносятся
+            base = ""
+            yield " "
+
+@lru_cache(maxsize=4096)
+def speakable_name(nickname):
+    """
+    Приводит ник к виду, удобному для озвучивания: декоративные буквы (𝓐𝓵𝓲𝓬𝓮, Ａｌｉｃｅ)
+    заменяются обычными, эмодзи и символы удаляются, повторы сокращаются, длина ограничивается.
+    Результат запоминается, поэтому постоянные зрители обрабатываются один раз
+    """
+    text = unicodedata.normalize("NFKC", nickname or "")
+    text = "".join(_speakable_chars(text))
+    text = _REPEAT_PATTERN.sub(r"\1", text)
+    words = text.split()
+    result = ""
+    for word in words:
+        candidate = f"{result} {word}" if result else word
+        if len(candidate) > MAX_NICKNAME_LENGTH:
+            if not result:
+                result = word[:MAX_NICKNAME_LENGTH]
+            break
+        result = candidate
+    return result or DEFAULT_NICKNAME
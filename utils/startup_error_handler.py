@@ -1,10 +1,12 @@
 import os
 import sys
+import json
+import hashlib
 import platform
 import importlib.util
 import traceback
 import ctypes
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 class StartupErrorHandler:
     """
@@ -43,6 +45,9 @@ class StartupErrorHandler:
         "API_MS_WIN_CRT_ERROR": "Запустите скрипт launch_tiktok_streamer.bat, который автоматически установит Microsoft Visual C++ Redistributable"
     }
     
+    # Файл с результатом последней успешной проверки окружения
+    ENVIRONMENT_CACHE_FILE = "environment_check.json"
+    
     @staticmethod
     def check_imports() -> List[str]:
         """
@@ -129,9 +134,106 @@ class StartupErrorHandler:
         )
     
     @staticmethod
-    def check_environment() -> Dict[str, List[str]]:
+    def get_environment_fingerprint() -> str:
+        """
+        Вычисляет отпечаток окружения: интерпретатор, site-packages, requirements.txt и PATH
+        """
+        parts = [
+            sys.executable,
+            sys.version,
+            platform.platform(),
+            ",".join(StartupErrorHandler.REQUIRED_MODULES),
+            ",".join(StartupErrorHandler.REQUIRED_DLLS_WINDOWS),
+        ]
+        
+        try:
+            parts.append(str(os.stat(sys.executable).st_mtime_ns))
+        except OSError:
+            pass
+        
+        # Установка или удаление пакета меняет mtime каталога site-packages
+        for path in sys.path:
+            if ("site-packages" in path or "dist-packages" in path) and os.path.isdir(path):
+                parts.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        
+        if os.path.exists("requirements.txt"):
+            with open("requirements.txt", "rb") as f:
+                parts.append(hashlib.sha256(f.read()).hexdigest())
+        
+        # От PATH зависит поиск DLL на Windows
+        if platform.system() == "Windows":
+            parts.append(os.environ.get("PATH", ""))
+        
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _load_environment_cache() -> Optional[Dict]:
+        """
+        Загружает кэш проверки окружения
+        """
+        try:
+            with open(StartupErrorHandler.ENVIRONMENT_CACHE_FILE, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else None
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def _save_environment_cache(fingerprint: str, startup_ok: bool) -> None:
+        """
+        Сохраняет кэш проверки окружения
+        """
+        try:
+            with open(StartupErrorHandler.ENVIRONMENT_CACHE_FILE, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint, "startup_ok": startup_ok}, f)
+        except OSError as e:
+            print(f"Не удалось сохранить кэш проверки окружения: {e}")
+    
+    @staticmethod
+    def invalidate_environment_cache() -> None:
+        """
+        Сбрасывает кэш проверки окружения, чтобы следующий запуск выполнил полную проверку
+        """
+        try:
+            if os.path.exists(StartupErrorHandler.ENVIRONMENT_CACHE_FILE):
+                os.remove(StartupErrorHandler.ENVIRONMENT_CACHE_FILE)
+        except OSError as e:
+            print(f"Не удалось удалить кэш проверки окружения: {e}")
+    
+    @staticmethod
+    def mark_startup_successful() -> None:
         """
-        Проверяет окружение на наличие всех необходимых компонентов
+        Отмечает успешный запуск: следующий запуск в том же окружении пропустит полную проверку
+        """
+        cache = StartupErrorHandler._load_environment_cache()
+        if cache and cache.get("fingerprint") and not cache.get("startup_ok"):
+            StartupErrorHandler._save_environment_cache(cache["fingerprint"], True)
+    
+    @staticmethod
+    def check_environment(use_cache: bool = True) -> Dict[str, List[str]]:
+        """
+        Проверяет окружение на наличие всех необходимых компонентов.
+        Проверка модулей и DLL пропускается, если окружение не менялось с последнего успешного запуска
+        """
+        fingerprint = StartupErrorHandler.get_environment_fingerprint() if use_cache else None
+        if fingerprint:
+            cache = StartupErrorHandler._load_environment_cache()
+            if cache and cache.get("fingerprint") == fingerprint and cache.get("startup_ok"):
+                # До подтверждения успешного запуска кэш считается недействительным
+                StartupErrorHandler._save_environment_cache(fingerprint, False)
+                if not StartupErrorHandler.check_assets_folder():
+                    return {"missing_folders": ["assets"]}
+                return {}
+        
+        issues = StartupErrorHandler._check_environment_full()
+        if fingerprint and not issues:
+            StartupErrorHandler._save_environment_cache(fingerprint, False)
+        return issues
+    
+    @staticmethod
+    def _check_environment_full() -> Dict[str, List[str]]:
+        """
+        Выполняет полную проверку окружения без использования кэша
         """
         issues = {}
         
@@ -186,6 +288,9 @@ class StartupErrorHandler:
         """
         error_message = f"Произошла критическая ошибка при запуске приложения:\n\n{str(e)}\n\n"
         
+        # Следующий запуск должен заново выполнить полную проверку окружения
+        StartupErrorHandler.invalidate_environment_cache()
+        
         # Проверяем типичные ошибки и добавляем решения
         if "ImportError" in str(type(e)) or "ModuleNotFoundError" in str(type(e)):
             module_name = str(e).split("'")[1] if "'" in str(e) else "Unknown"
@@ -0,0 +1,205 @@
+# utils/startup_profiler.py
+import os
+import sys
+import time
+import threading
+import importlib.abc
+from contextlib import contextmanager
+from datetime import datetime
+
+class _TimedLoader:
+    """
+    Обертка над загрузчиком модуля, замеряющая время create_module и exec_module.
+    У модулей расширений (PyQt6, pygame, _sqlite3) библиотека загружается в create_module
+    """
+    def __init__(self, loader, fullname, profiler):
+        self._loader = loader
+        self._fullname = fullname
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        self._profiler._import_started(self._fullname)
+        try:
+            return self._loader.create_module(spec)
+        finally:
+            self._profiler._import_finished(self._fullname)
+
+    def exec_module(self, module):
+        self._profiler._import_started(self._fullname)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._import_finished(self._fullname)
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Finder в начале sys.meta_path, который подменяет загрузчики на замеряющие
+    """
+    def __init__(self, profiler):
+        self._profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        # Защита от рекурсии: ищем спецификацию у остальных finder'ов
+        if getattr(self._local, 'busy', False):
+            return None
+        self._local.busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                        spec.loader = _TimedLoader(spec.loader, fullname, self._profiler)
+                    return spec
+            return None
+        finally:
+            self._local.busy = False
+
+class StartupProfiler:
+    """
+    Профилировщик запуска приложения: время фаз main() и импорта модулей.
+    Включается флагом --profile-startup или переменной окружения TTSTREAMER_PROFILE_STARTUP=1
+    """
+    _instance = None
+
+    CLI_FLAG = "--profile-startup"
+    ENV_VAR = "TTSTREAMER_PROFILE_STARTUP"
+    REPORT_FILE = os.path.join("logs", "startup_profile.txt")
+    # Сколько самых медленных импортов попадает в отчет
+    TOP_IMPORTS = 40
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(StartupProfiler, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        """
+        Инициализация профилировщика
+        """
+        self.start_time = time.perf_counter()
+        self.enabled = (
+            self.CLI_FLAG in sys.argv
+            or os.environ.get(self.ENV_VAR, "").lower() in ("1", "true", "yes")
+        )
+        if self.CLI_FLAG in sys.argv:
+            sys.argv.remove(self.CLI_FLAG)
+        self.phases = []
+        self.marks = []
+        self.imports = {}
+        self._import_stack = []
+        self._import_lock = threading.Lock()
+        self._import_timer = None
+        self.report_written = False
+        if self.enabled:
+            self._install_import_hook()
+
+    def _install_import_hook(self):
+        """
+        Устанавливает перехватчик импорта для замера времени загрузки модулей
+        """
+        self._import_timer = _ImportTimer(self)
+        sys.meta_path.insert(0, self._import_timer)
+
+    def _remove_import_hook(self):
+        """
+        Удаляет перехватчик импорта
+        """
+        if self._import_timer in sys.meta_path:
+            sys.meta_path.remove(self._import_timer)
+        self._import_timer = None
+
+    def _import_started(self, fullname):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        self._import_stack.append([fullname, time.perf_counter(), 0.0])
+
+    def _import_finished(self, fullname):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        if not self._import_stack or self._import_stack[-1][0] != fullname:
+            return
+        name, started, children = self._import_stack.pop()
+        cumulative = time.perf_counter() - started
+        with self._import_lock:
+            # create_module и exec_module одного модуля складываются в одну запись
+            own, total = self.imports.get(name, (0.0, 0.0))
+            self.imports[name] = (own + cumulative - children, total + cumulative)
+        # Время вложенного импорта вычитается из собственного времени родителя
+        if self._import_stack:
+            self._import_stack[-1][2] += cumulative
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Замеряет длительность фазы запуска
+        """
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            self.phases.append((name, started - self.start_time, finished - started))
+
+    def mark(self, name):
+        """
+        Отмечает момент времени относительно старта
+        """
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.start_time))
+
+    def format_report(self):
+        """
+        Формирует текстовый отчет о запуске
+        """
+        lines = [
+            f"Профиль запуска TTStreamerPy ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})",
+            f"Python {sys.version.split()[0]} на {sys.platform}",
+            "",
+            "Фазы запуска (начало от старта / длительность, мс):",
+        ]
+        for name, offset, duration in self.phases:
+            lines.append(f"  {name:<32} {offset * 1000:>9.1f} {duration * 1000:>9.1f}")
+        if self.marks:
+            lines.append("")
+            lines.append("Отметки (от старта, мс):")
+            for name, offset in self.marks:
+                lines.append(f"  {name:<32} {offset * 1000:>9.1f}")
+        with self._import_lock:
+            imports = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        lines.append("")
+        lines.append(f"Импорт модулей: {len(imports)} модулей, "
+                     f"{sum(own for own, _ in self.imports.values()) * 1000:.1f} мс суммарно")
+        lines.append(f"Самые медленные импорты (собственное / суммарное время, мс), топ {self.TOP_IMPORTS}:")
+        for name, (own, cumulative) in imports[:self.TOP_IMPORTS]:
+            lines.append(f"  {name:<48} {own * 1000:>9.1f} {cumulative * 1000:>9.1f}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path=None):
+        """
+        Записывает отчет в файл и отключает перехватчик импорта
+        """
+        if not self.enabled or self.report_written:
+            return None
+        self._remove_import_hook()
+        path = path or self.REPORT_FILE
+        try:
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.format_report())
+            self.report_written = True
+            return path
+        except Exception as e:
+            print(f"Ошибка при записи профиля запуска: {str(e)}")
+            return None
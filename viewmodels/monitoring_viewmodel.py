@@ -1,23 +1,43 @@
+import asyncio
 import threading
+from dataclasses import replace
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
-from models.data_models import TableItemView, AlertLevel
+from models.data_models import TableItemView, AlertLevel, EventType
+from services.rule_engine import ACTION_SOUND, ACTION_SPEECH
 from utils.settings import Settings
 from utils.logger import Logger
 from utils.error_handler import ErrorHandler
+from utils.speech_text import speakable_name
 from .tiktok_connection import TikTokConnection
 
 class MonitoringViewModel(QObject):
+    # Сколько последних событий хранится в памяти
+    MAX_ITEMS = 1000
+
+    # Как озвучивать несколько однотипных событий одной фразой, когда озвучивание отстает
+    SPEECH_SUMMARIES = {
+        EventType.JOIN: "@names подключились к стриму",
+        EventType.LIKE: "@names поставили лайки",
+        EventType.GIFT: "@names отправили подарки",
+    }
+
     status_changed = pyqtSignal(str)
     item_added = pyqtSignal(TableItemView)
+    item_updated = pyqtSignal(TableItemView)
+    items_cleared = pyqtSignal()
 
-    def __init__(self, speech_service, sound_service, gift_service):
+    def __init__(self, speech_service, sound_service, gift_service, settings=None, history_service=None,
+                 stats_service=None, rule_engine=None):
         super().__init__()
         self.logger = Logger().get_logger('MonitoringViewModel')
         self.logger.info("Инициализация ViewModel мониторинга")
         self.speech_service = speech_service
         self.sound_service = sound_service
         self.gift_service = gift_service
-        self.settings = Settings()
+        self.history_service = history_service
+        self.stats_service = stats_service
+        self.rule_engine = rule_engine
+        self.settings = settings or Settings()
         self.error_handler = ErrorHandler()
         self._is_monitoring = False
         self._is_processing = False
@@ -77,6 +97,7 @@ class MonitoringViewModel(QObject):
             self._notify_gift = value
             self.settings.notify_gift = value
             asyncio.run(self.settings.save())
+            self.reload_rules()
             self.logger.debug(f"Настройка звуковых оповещений изменена: {value}")
 
     @property
@@ -89,6 +110,7 @@ class MonitoringViewModel(QObject):
             self._speech_gift = value
             self.settings.speech_gift = value
             asyncio.run(self.settings.save())
+            self.reload_rules()
             self.logger.debug(f"Настройка озвучивания подарков изменена: {value}")
 
     @property
@@ -101,6 +123,7 @@ class MonitoringViewModel(QObject):
             self._speech_like = value
             self.settings.speech_like = value
             asyncio.run(self.settings.save())
+            self.reload_rules()
             self.logger.debug(f"Настройка озвучивания лайков изменена: {value}")
 
     @property
@@ -113,6 +136,7 @@ class MonitoringViewModel(QObject):
             self._speech_member = value
             self.settings.speech_member = value
             asyncio.run(self.settings.save())
+            self.reload_rules()
             self.logger.debug(f"Настройка озвучивания подключений изменена: {value}")
 
     @property
@@ -127,13 +151,18 @@ class MonitoringViewModel(QObject):
             asyncio.run(self.settings.save())
             self.logger.debug(f"Настройка громкости речи изменена: {value}")
 
+    def reload_rules(self):
+        """Применяет измененные настройки оповещений к уже идущему мониторингу"""
+        if self.rule_engine:
+            self.rule_engine.reload()
+
     def add_item(self, item):
         """
         Добавляет новое событие в список
         """
         try:
             self.item_list.insert(0, item)
-            if len(self.item_list) > 1000:
+            if len(self.item_list) > self.MAX_ITEMS:
                 self.item_list.pop()
             self.logger.debug(f"Добавлено событие: {item.timestamp} - {item.name} - {item.event}")
             self.item_added.emit(item)
@@ -155,10 +184,20 @@ class MonitoringViewModel(QObject):
         self.logger.info(f"Запуск мониторинга стрима: {self.stream}")
         self.is_processing = True
         self.item_list.clear()
+        if self.history_service:
+            self.history_service.start_session(self.stream)
+        if self.stats_service:
+            self.stats_service.reset(self.stream)
+        self.items_cleared.emit()
         self.status_changed.emit("Подключение...")
-        self.connection = TikTokConnection(self.stream, self.settings, self.speech_service, self.sound_service, self.gift_service)
+        self.connection = TikTokConnection(self.stream, self.settings, self.speech_service, self.sound_service,
+                                           self.gift_service, self.history_service, self.stats_service,
+                                           self.rule_engine)
         self.connection.status_changed.connect(self.on_status_changed)
         self.connection.item_added.connect(self.on_item_added)
+        self.connection.item_updated.connect(self.on_item_updated)
+        self.connection.gift_image_ready.connect(self.on_gift_image_ready)
+        self.connection.rules_triggered.connect(self.on_rules_triggered)
         self.thread = QThread()
         self.connection.moveToThread(self.thread)
         self.thread.started.connect(self.connection.start)
@@ -203,6 +242,47 @@ class MonitoringViewModel(QObject):
         self.logger.debug(f"Получено новое событие: {item.timestamp} - {item.name} - {item.event}")
         self.add_item(item)
 
+    def on_item_updated(self, item):
+        """Заменяет ранее добавленное событие с тем же порядковым номером"""
+        try:
+            for index, existing in enumerate(self.item_list):
+                if existing.seq == item.seq:
+                    self.item_list[index] = item
+                    break
+            self.item_updated.emit(item)
+        except Exception as e:
+            self.logger.error(f"Ошибка при обновлении события в списке: {str(e)}")
+
+    def on_gift_image_ready(self, gift_id, image):
+        """Добавляет загруженное изображение подарка в строки, добавленные до окончания загрузки"""
+        try:
+            for index, item in enumerate(self.item_list):
+                if item.gift_id == gift_id and not item.gift_image:
+                    self.item_list[index] = replace(item, gift_image=image)
+                    self.item_updated.emit(self.item_list[index])
+        except Exception as e:
+            self.logger.error(f"Ошибка при добавлении изображения подарка: {str(e)}", exc_info=True)
+
+    def on_rules_triggered(self, item, rules):
+        """
+        Выполняет звуки и озвучивание правил, совпавших с событием.
+        Для подарка - один раз: для серии после ее завершения, с итоговым количеством
+        """
+        try:
+            for rule in rules:
+                if rule.action == ACTION_SOUND:
+                    if rule.sound:
+                        self.sound_service.play_file(rule.sound, self.settings.notify_delay)
+                    elif item.event_type == EventType.GIFT:
+                        self.sound_service.play(item.gift_id, self.settings.notify_delay)
+                elif rule.action == ACTION_SPEECH and rule.speech:
+                    name = speakable_name(item.name)
+                    self.speech_service.speech(rule.render_speech(item, name), self.settings.speech_voice,
+                                               self.settings.speech_rate, self.speech_volume,
+                                               summary=self.SPEECH_SUMMARIES.get(item.event_type), name=name)
+        except Exception as e:
+            self.logger.error(f"Ошибка при выполнении правил события: {str(e)}", exc_info=True)
+
     def on_thread_finished(self):
         self.logger.debug("Поток завершен")
         self.is_monitoring = False
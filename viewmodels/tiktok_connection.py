@@ -1,15 +1,40 @@
 from TikTokLive import TikTokLiveClient
 from TikTokLive.events import ConnectEvent, DisconnectEvent, CommentEvent, LikeEvent, GiftEvent, JoinEvent
-from models.data_models import TableItemView, AlertLevel
+from models.data_models import TableItemView, AlertLevel, EventType
+from services.rule_engine import NO_DECISION
 from utils.logger import Logger
+from utils.spam_filter import SpamFilter
 from PyQt6.QtCore import QObject, pyqtSignal
+from dataclasses import replace
 from datetime import datetime
+import asyncio
+import time
 
 class TikTokConnection(QObject):
     status_changed = pyqtSignal(str)
     item_added = pyqtSignal(TableItemView)
+    # Строка уже добавленного события изменилась (например, продолжилась серия подарков)
+    item_updated = pyqtSignal(TableItemView)
+    # Изображение подарка загружено в кэш: ID подарка, base64-изображение
+    gift_image_ready = pyqtSignal(object, str)
+    # Событие совпало с правилами звука и озвучивания: строка, кортеж EventRule.
+    # Для подарков - один раз, когда подарок получен окончательно
+    rules_triggered = pyqtSignal(TableItemView, object)
+    # Через сколько секунд без продолжения серия подарков считается завершенной
+    STREAK_TIMEOUT = 30
+    # Как часто проверяются серии подарков, которые перестали продолжаться (с)
+    STREAK_CHECK_INTERVAL = 5
+    # Сколько секунд строка, объединяющая события правилом aggregate, принимает новые события
+    AGGREGATE_WINDOW = 30
+    # При таком числе открытых объединенных строк устаревшие удаляются
+    MAX_AGGREGATES = 1000
+    # Сколько серий, завершенных по таймауту, помнится на случай их продолжения
+    MAX_EXPIRED_STREAKS = 1000
+    # События, которые проходят через защиту от спама
+    SPAM_EVENT_TYPES = (EventType.COMMENT, EventType.JOIN)
 
-    def __init__(self, unique_id, settings, speech_service, sound_service, gift_service):
+    def __init__(self, unique_id, settings, speech_service, sound_service, gift_service, history_service=None,
+                 stats_service=None, rule_engine=None):
         super().__init__()
         self.logger = Logger().get_logger('TikTokConnection')
         self.logger.info("Инициализация TikTokConnection")
@@ -18,6 +43,20 @@ class TikTokConnection(QObject):
         self.speech_service = speech_service
         self.sound_service = sound_service
         self.gift_service = gift_service
+        self.history_service = history_service
+        self.stats_service = stats_service
+        self.rule_engine = rule_engine
+        self._seq = 0
+        # Открытые серии подарков: (пользователь, ID подарка) -> (строка, время последнего обновления)
+        self._streaks = {}
+        # Серии, завершенные по таймауту: (пользователь, ID подарка) -> количество, уже учтенное в статистике.
+        # Если серия продолжится, в статистику попадет только прирост
+        self._expired_streaks = {}
+        # Строки, объединяющие события: (тип события, пользователь) -> (строка, время последнего обновления)
+        self._aggregates = {}
+        self.spam_filter = SpamFilter(settings.spam_rate_per_minute, settings.spam_burst)
+        self._prefetch_task = None
+        self._streak_task = None
         self.client = TikTokLiveClient(unique_id=self.unique_id)
 
         # Подключаем обработчики событий
@@ -37,48 +76,178 @@ class TikTokConnection(QObject):
             event=f"Подключено к стриму @{event.unique_id}",
             alert_level=AlertLevel.NORMAL
         )
-        self.item_added.emit(item)
+        self.emit_item(item)
+        # Серия завершается по таймауту, даже если новых подарков больше не приходит
+        self._streak_task = asyncio.create_task(self.expire_streaks())
+        if self.settings.prefetch_gifts:
+            # Каталог загружается в фоне, не задерживая обработку событий
+            self._prefetch_task = asyncio.create_task(self.prefetch_gifts())
+
+    async def prefetch_gifts(self):
+        """Запрашивает список подарков стрима и ставит их изображения в фоновую загрузку"""
+        try:
+            data = await self.client.web.fetch_gift_list()
+            gifts = []
+            for gift in data.get("gifts", []):
+                url_list = (gift.get("image") or {}).get("url_list") or []
+                if gift.get("id") and url_list:
+                    gifts.append((gift["id"], gift.get("name", ""), url_list[0]))
+            self.logger.debug(f"Получен каталог из {len(gifts)} подарков")
+            self.gift_service.prefetch(gifts)
+        except Exception as e:
+            self.logger.warning(f"Не удалось получить каталог подарков: {str(e)}")
+
+    async def expire_streaks(self):
+        """Периодически завершает серии подарков, по которым давно не было событий"""
+        while True:
+            await asyncio.sleep(self.STREAK_CHECK_INTERVAL)
+            try:
+                self.finish_streaks(time.monotonic() - self.STREAK_TIMEOUT)
+            except Exception as e:
+                self.logger.error(f"Ошибка при завершении серий подарков: {str(e)}", exc_info=True)
 
     async def on_disconnect(self, event: DisconnectEvent):
         self.logger.info(f"Отключено от @{self.unique_id}")
         self.status_changed.emit("Мониторинг остановлен")
+        if self._streak_task is not None:
+            self._streak_task.cancel()
+            self._streak_task = None
+        self.finish_streaks()
+        self._expired_streaks.clear()
         item = TableItemView(
             timestamp=datetime.now(),
             name="Система",
             event=f"Отключено от стрима @{self.unique_id}",
             alert_level=AlertLevel.NORMAL
         )
-        self.item_added.emit(item)
+        self.emit_item(item)
 
     async def on_comment(self, event: CommentEvent):
         self.logger.info(f"{event.user.nickname} -> {event.comment}")
+        if self.stats_service:
+            self.stats_service.record_comment(event.user.unique_id, event.user.nickname)
         item = TableItemView(
             timestamp=datetime.now(),
             name=event.user.nickname,
             event=event.comment,
-            alert_level=AlertLevel.NORMAL
+            alert_level=AlertLevel.NORMAL,
+            event_type=EventType.COMMENT,
+            user_id=event.user.unique_id
         )
-        self.item_added.emit(item)
+        self.dispatch_item(item)
 
     async def on_like(self, event: LikeEvent):
         self.logger.info(f"Получен лайк от {event.user.nickname}")
+        if self.stats_service:
+            self.stats_service.record_like(event.user.unique_id, event.user.nickname, event.count or 1)
         item = TableItemView(
             timestamp=datetime.now(),
             name=event.user.nickname,
             event="Лайк",
-            alert_level=AlertLevel.NORMAL
+            alert_level=AlertLevel.NORMAL,
+            event_type=EventType.LIKE,
+            user_id=event.user.unique_id
         )
-        self.item_added.emit(item)
+        self.dispatch_item(item)
 
     async def on_gift(self, event: GiftEvent):
         self.logger.info(f"Получен подарок {event.gift.name} от {event.user.nickname}")
-        item = TableItemView(
-            timestamp=datetime.now(),
-            name=event.user.nickname,
-            event=f"Подарок: {event.gift.name}",
-            alert_level=AlertLevel.IMPORTANT
-        )
-        self.item_added.emit(item)
+        self.finish_streaks(time.monotonic() - self.STREAK_TIMEOUT)
+        key = (event.user.unique_id, event.gift.id)
+        count = event.repeat_count or 1
+        streak = self._streaks.pop(key, None)
+        if streak is None and key in self._expired_streaks and count <= self._expired_streaks[key]:
+            # Счетчик начался заново: это новая серия, а не продолжение завершенной по таймауту
+            del self._expired_streaks[key]
+        if streak is None:
+            item = TableItemView(
+                timestamp=datetime.now(),
+                name=event.user.nickname,
+                event=self.gift_text(event.gift.name, count),
+                alert_level=AlertLevel.NORMAL,
+                gift_name=event.gift.name,
+                event_type=EventType.GIFT,
+                user_id=event.user.unique_id,
+                gift_id=event.gift.id,
+                gift_count=count,
+                diamond_count=event.gift.diamond_count
+            )
+        else:
+            # Продолжение серии обновляет ту же строку вместо добавления новой
+            item = replace(streak[0], timestamp=datetime.now(), event=self.gift_text(event.gift.name, count),
+                           gift_count=count)
+        # Правила проверяются на каждом событии серии: условие на стоимость зависит от количества
+        decision = self.rule_engine.evaluate(item) if self.rule_engine else NO_DECISION
+        if decision.highlight:
+            item.alert_level = AlertLevel.IMPORTANT
+        if streak is None:
+            if decision.drop:
+                # Серия не отслеживается: если она продолжится и перестанет попадать под правило,
+                # строка появится с текущим количеством
+                if not event.streaking:
+                    self.complete_gift(item, decision)
+                return
+            item.gift_image = self.gift_image(event.gift)
+            self.emit_item(item)
+        else:
+            if not item.gift_image:
+                item.gift_image = self.gift_image(event.gift)
+            self.update_item(item)
+        if event.streaking:
+            self._streaks[key] = (item, time.monotonic())
+        else:
+            self.complete_gift(item, decision)
+
+    def gift_image(self, gift):
+        """
+        Возвращает изображение подарка из кэша в памяти. Если его там нет, ставит загрузку
+        в фоновую очередь и возвращает пустую строку: обработчик событий не ждет ни диск, ни сеть
+        """
+        cached = self.gift_service.get(gift.id)
+        if cached:
+            return cached.image
+        url_list = gift.image.url_list if gift.image else []
+        if url_list:
+            self.gift_service.fetch_async(gift.id, gift.name, url_list[0], self.on_gift_image_loaded)
+        return ""
+
+    def on_gift_image_loaded(self, gift):
+        # Вызывается из потока загрузки; сигнал доставит изображение в поток GUI
+        if gift:
+            self.gift_image_ready.emit(gift.id, gift.image)
+
+    @staticmethod
+    def gift_text(gift_name, count):
+        return f"Подарок: {gift_name} x{count}" if count > 1 else f"Подарок: {gift_name}"
+
+    def finish_streaks(self, older_than=None):
+        """
+        Завершает серии подарков, по которым давно не было событий
+        (или все открытые серии, если older_than не указан)
+        """
+        for key, (item, updated_at) in list(self._streaks.items()):
+            if older_than is None or updated_at < older_than:
+                del self._streaks[key]
+                self.logger.debug(f"Серия подарка {item.gift_name} от {item.name} завершена по таймауту")
+                self.complete_gift(item)
+                if older_than is not None:
+                    self._expired_streaks[key] = item.gift_count
+                    if len(self._expired_streaks) > self.MAX_EXPIRED_STREAKS:
+                        del self._expired_streaks[next(iter(self._expired_streaks))]
+
+    def complete_gift(self, item, decision=None):
+        """
+        Подарок получен окончательно: одиночный подарок или завершенная серия.
+        Здесь же подарок учитывается в статистике - один раз, с итоговым количеством;
+        у продолжения серии, завершенной по таймауту, учитывается только прирост
+        """
+        recorded = self._expired_streaks.pop((item.user_id, item.gift_id), 0)
+        if self.stats_service and item.gift_count > recorded:
+            self.stats_service.record_gift(item.user_id, item.name, item.diamond_count, item.gift_count - recorded)
+        if decision is None:
+            decision = self.rule_engine.evaluate(item) if self.rule_engine else NO_DECISION
+        if decision.alerts and not decision.drop:
+            self.rules_triggered.emit(item, decision.alerts)
 
     async def on_join(self, event: JoinEvent):
         self.logger.info(f"Новое подключение: {event.user.nickname}")
@@ -86,10 +255,90 @@ class TikTokConnection(QObject):
             timestamp=datetime.now(),
             name=event.user.nickname,
             event="Подключение",
-            alert_level=AlertLevel.NORMAL
+            alert_level=AlertLevel.NORMAL,
+            event_type=EventType.JOIN,
+            user_id=event.user.unique_id
         )
+        self.dispatch_item(item)
+
+    def dispatch_item(self, item):
+        """
+        Применяет к событию правила: отбрасывает, выделяет или объединяет его строку
+        и передает совпавшие звуки и озвучивание в GUI
+        """
+        decision = self.rule_engine.evaluate(item) if self.rule_engine else NO_DECISION
+        if decision.drop:
+            return
+        if decision.highlight:
+            item.alert_level = AlertLevel.IMPORTANT
+        alerts = decision.alerts
+        previous = None
+        is_spam_checked = item.event_type in self.SPAM_EVENT_TYPES
+        if is_spam_checked:
+            text = item.event
+            allowed = self.spam_filter.allow(item.user_id)
+            previous = self.spam_filter.repeat_of(item)
+            if not allowed or previous is not None:
+                # Пользователь, превысивший лимит или повторяющий сообщение, не озвучивается
+                # и не запускает звуки триггеров
+                alerts = ()
+        if decision.aggregate:
+            item = self.aggregate_item(item)
+        elif previous is not None:
+            # Повтор того же сообщения увеличивает счетчик его строки
+            item = self.merge_item(previous, item)
+        else:
+            self.emit_item(item)
+        if is_spam_checked:
+            self.spam_filter.remember(item, text)
+        if alerts:
+            self.rules_triggered.emit(item, alerts)
+
+    def aggregate_item(self, item):
+        """
+        Объединяет однотипные события пользователя в одну строку со счетчиком,
+        пока между ними проходит не больше AGGREGATE_WINDOW секунд
+        """
+        now = time.monotonic()
+        key = (item.event_type, item.user_id)
+        aggregate = self._aggregates.get(key)
+        if aggregate is not None and now - aggregate[1] <= self.AGGREGATE_WINDOW:
+            item = self.merge_item(aggregate[0], item)
+        else:
+            if len(self._aggregates) >= self.MAX_AGGREGATES:
+                for old_key, (_, updated_at) in list(self._aggregates.items()):
+                    if now - updated_at > self.AGGREGATE_WINDOW:
+                        del self._aggregates[old_key]
+            item.repeat_count = 1
+            self.emit_item(item)
+        self._aggregates[key] = (item, now)
+        return item
+
+    def merge_item(self, previous, item):
+        """Добавляет событие item к ранее переданной строке previous, увеличивая ее счетчик"""
+        count = max(previous.repeat_count, 1) + 1
+        item = replace(previous, timestamp=item.timestamp, event=f"{item.event} x{count}",
+                       alert_level=max(previous.alert_level, item.alert_level), repeat_count=count)
+        self.update_item(item)
+        return item
+
+    def emit_item(self, item):
+        """
+        Назначает событию порядковый номер, ставит его в очередь записи истории
+        прямо из потока подключения и передает в GUI
+        """
+        self._seq += 1
+        item.seq = self._seq
+        if self.history_service:
+            self.history_service.append(item)
         self.item_added.emit(item)
 
+    def update_item(self, item):
+        """Перезаписывает ранее переданное событие с тем же порядковым номером"""
+        if self.history_service:
+            self.history_service.append(item)
+        self.item_updated.emit(item)
+
     def start(self):
         self.logger.info("Запуск клиента TikTok Live")
         self.client.run()
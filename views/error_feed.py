@@ -0,0 +1,79 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QToolButton, QPushButton, QListWidget, QListWidgetItem
+from PyQt6.QtCore import Qt, QTimer
+from utils.error_handler import ErrorHandler
+from utils.logger import Logger
+
+class ErrorFeed(QWidget):
+    """
+    Немодальная сворачиваемая лента ошибок: одинаковые ошибки показываются одной строкой
+    со счетчиком. Журнал читается по таймеру, поэтому ошибки из любых потоков
+    не вызывают перерисовку чаще одного раза за интервал
+    """
+    # Интервал проверки журнала ошибок (мс)
+    REFRESH_INTERVAL = 1000
+    # Высота развернутого списка ошибок
+    LIST_HEIGHT = 120
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.aggregator = ErrorHandler().aggregator
+        self.logger = Logger().get_logger('ErrorFeed')
+        self.version = None
+        self.init_ui()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh()
+
+    def init_ui(self):
+        """Инициализирует интерфейс ленты ошибок"""
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        header_layout = QHBoxLayout()
+        self.toggle_btn = QToolButton()
+        self.toggle_btn.setCheckable(True)
+        self.toggle_btn.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
+        self.toggle_btn.setArrowType(Qt.ArrowType.RightArrow)
+        self.toggle_btn.toggled.connect(self.set_expanded)
+        header_layout.addWidget(self.toggle_btn)
+        header_layout.addStretch(1)
+        self.clear_btn = QPushButton("Очистить")
+        self.clear_btn.clicked.connect(self.clear)
+        header_layout.addWidget(self.clear_btn)
+        layout.addLayout(header_layout)
+        self.error_list = QListWidget()
+        self.error_list.setFixedHeight(self.LIST_HEIGHT)
+        self.error_list.setVisible(False)
+        layout.addWidget(self.error_list)
+        self.setLayout(layout)
+
+    def set_expanded(self, expanded):
+        self.toggle_btn.setArrowType(Qt.ArrowType.DownArrow if expanded else Qt.ArrowType.RightArrow)
+        self.error_list.setVisible(expanded)
+
+    def refresh(self):
+        """Перестраивает список, только если журнал изменился с прошлой проверки"""
+        try:
+            version, records = self.aggregator.snapshot()
+            if version == self.version:
+                return
+            self.version = version
+            self.error_list.clear()
+            total = 0
+            for record in records:
+                total += record.count
+                count = f" (x{record.count})" if record.count > 1 else ""
+                message = record.message.replace("\n", " ")
+                item = QListWidgetItem(f"{record.last_seen.strftime('%H:%M:%S')} {record.title}{count}: {message}")
+                item.setToolTip(record.details or record.message)
+                self.error_list.addItem(item)
+            self.toggle_btn.setText(f"Ошибки: {len(records)} (всего {total})")
+            self.setVisible(bool(records))
+        except Exception as e:
+            self.logger.error(f"Ошибка при обновлении ленты ошибок: {str(e)}", exc_info=True)
+
+    def clear(self):
+        self.aggregator.clear()
+        self.toggle_btn.setChecked(False)
+        self.refresh()
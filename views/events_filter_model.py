@@ -0,0 +1,256 @@
+# events_filter_model.py
+import re
+import sys
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Optional
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from models.data_models import AlertLevel, EventType
+from utils.logger import Logger
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+def _words(text):
+    return _WORD_PATTERN.findall(text.casefold())
+
+@dataclass(frozen=True)
+class EventFilter:
+    """Условия фильтрации таблицы событий"""
+    event_type: Optional[EventType] = None
+    alert_level: Optional[AlertLevel] = None
+    user: str = ""  # Точное имя пользователя без учета регистра
+    text: str = ""  # Слова (или их части) в тексте комментария, в любом порядке; знаки препинания не ищутся
+
+    @property
+    def is_active(self):
+        return (self.event_type is not None or self.alert_level is not None
+                or bool(self.user) or bool(self.text))
+
+class EventsFilterModel(QAbstractTableModel):
+    """
+    Отфильтрованное представление таблицы событий.
+    Индексы по типу события, уровню важности и пользователю обновляются по мере
+    поступления событий, поэтому смена фильтра не требует полного перебора истории,
+    а каждое новое событие проверяется по активному фильтру ровно один раз.
+    Комментарии индексируются по словам: поиск текста просматривает словарь слов,
+    а не тексты всех сохраненных комментариев
+    """
+    # Сколько последних событий сессии хранится в индексах
+    MAX_INDEXED_EVENTS = 200000
+
+    def __init__(self, source_model, viewmodel):
+        super().__init__()
+        self.source_model = source_model
+        self.viewmodel = viewmodel
+        self.headers = source_model.headers
+        self.GIFT_COLUMN = source_model.GIFT_COLUMN
+        self.IMPORTANT_COLOR = source_model.IMPORTANT_COLOR
+        self.logger = Logger().get_logger('EventsFilterModel')
+        self.filter = EventFilter()
+        # Без истории на диске старые строки показать нельзя, поэтому и индексировать их незачем
+        self.max_indexed = self.MAX_INDEXED_EVENTS if viewmodel.history_service else viewmodel.MAX_ITEMS
+        self._reset_indexes()
+        # Подключаемся после исходной модели: к моменту вызова add_item она уже знает о событии
+        self.viewmodel.item_added.connect(self.add_item)
+        self.viewmodel.item_updated.connect(self.update_item)
+        self.source_model.decoder.image_ready.connect(self.on_image_ready)
+        self.viewmodel.items_cleared.connect(self.clear)
+        if self.viewmodel.item_list:
+            self.oldest_seq = self.viewmodel.item_list[-1].seq
+        for item in reversed(self.viewmodel.item_list):
+            self._index_item(item)
+
+    def _reset_indexes(self):
+        self.meta = {}  # seq -> (тип, уровень, пользователь, слова комментария)
+        self.by_type = {}
+        self.by_level = {}
+        self.by_user = {}
+        self.by_word = {}  # слово комментария в нижнем регистре -> номера событий
+        self.filter_words = ()
+        self.oldest_seq = 1
+        # Номера подходящих событий по возрастанию (новые в конце)
+        self.matches = []
+
+    def _index_item(self, item):
+        seq = item.seq
+        user_key = item.name.casefold()
+        words = ()
+        if item.event_type == EventType.COMMENT:
+            # Одинаковые слова разных комментариев хранятся одной строкой
+            words = frozenset(sys.intern(word) for word in _words(item.event))
+        self.meta[seq] = (item.event_type, item.alert_level, user_key, words)
+        self.by_type.setdefault(item.event_type, set()).add(seq)
+        self.by_level.setdefault(item.alert_level, set()).add(seq)
+        self.by_user.setdefault(user_key, set()).add(seq)
+        for word in words:
+            self.by_word.setdefault(word, set()).add(seq)
+        while len(self.meta) > self.max_indexed:
+            self._evict(self.oldest_seq)
+            self.oldest_seq += 1
+
+    def _evict(self, seq):
+        meta = self.meta.pop(seq, None)
+        if meta is None:
+            return
+        event_type, alert_level, user_key, words = meta
+        keys = [(self.by_type, event_type), (self.by_level, alert_level), (self.by_user, user_key)]
+        keys.extend((self.by_word, word) for word in words)
+        for index, key in keys:
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.discard(seq)
+                if not bucket:
+                    del index[key]
+
+    def _matches(self, seq):
+        """Проверяет одно событие по активному фильтру"""
+        event_type, alert_level, user_key, words = self.meta[seq]
+        event_filter = self.filter
+        if event_filter.event_type is not None and event_type != event_filter.event_type:
+            return False
+        if event_filter.alert_level is not None and alert_level != event_filter.alert_level:
+            return False
+        if event_filter.user and user_key != event_filter.user.casefold():
+            return False
+        if event_filter.text:
+            # Запрос без слов (только знаки препинания или эмодзи) ничего не находит
+            if event_type != EventType.COMMENT or not self.filter_words:
+                return False
+            if not all(any(part in word for word in words) for part in self.filter_words):
+                return False
+        return True
+
+    def _text_bucket(self, parts):
+        """
+        Номера комментариев, в которых каждое слово запроса входит в какое-нибудь слово
+        комментария. Просматривается словарь слов, который намного меньше числа комментариев
+        """
+        result = None
+        # Длинные части запроса встречаются реже, с них пересечение быстрее сужается
+        for part in sorted(parts, key=len, reverse=True):
+            bucket = set()
+            for word, seqs in self.by_word.items():
+                if part in word:
+                    bucket.update(seqs)
+            result = bucket if result is None else result & bucket
+            if not result:
+                break
+        return result
+
+    def set_filter(self, event_filter):
+        """Применяет новый фильтр, пересекая индексы вместо перебора всех событий"""
+        self.beginResetModel()
+        self.filter = event_filter
+        buckets = []
+        if event_filter.event_type is not None:
+            buckets.append(self.by_type.get(event_filter.event_type, set()))
+        if event_filter.alert_level is not None:
+            buckets.append(self.by_level.get(event_filter.alert_level, set()))
+        if event_filter.user:
+            buckets.append(self.by_user.get(event_filter.user.casefold(), set()))
+        self.filter_words = tuple(set(_words(event_filter.text)))
+        if event_filter.text:
+            # Поиск текста выполняется только среди комментариев
+            buckets.append(self.by_type.get(EventType.COMMENT, set()))
+        if buckets:
+            buckets.sort(key=len)
+            candidates = set(buckets[0]).intersection(*buckets[1:])
+            if event_filter.text and not self.filter_words:
+                candidates = ()
+            elif candidates and self.filter_words:
+                if len(candidates) < len(self.by_word):
+                    # Отобранных событий меньше, чем слов в словаре: проще проверить их напрямую
+                    candidates = {seq for seq in candidates if self._matches(seq)}
+                else:
+                    candidates &= self._text_bucket(self.filter_words)
+        else:
+            # Без фильтра таблица показывает исходную модель напрямую
+            candidates = ()
+        self.matches = sorted(candidates)
+        self.endResetModel()
+        self.logger.debug(f"Применен фильтр {event_filter}: найдено {len(self.matches)} событий")
+
+    def add_item(self, item):
+        """Индексирует новое событие и добавляет его в выборку, если оно подходит под фильтр"""
+        try:
+            self._index_item(item)
+            if self.matches and self.matches[0] < self.oldest_seq:
+                stale = next((i for i, seq in enumerate(self.matches) if seq >= self.oldest_seq), len(self.matches))
+                self.beginRemoveRows(QModelIndex(), len(self.matches) - stale, len(self.matches) - 1)
+                del self.matches[:stale]
+                self.endRemoveRows()
+            if self.filter.is_active and self._matches(item.seq):
+                self.beginInsertRows(QModelIndex(), 0, 0)
+                self.matches.append(item.seq)
+                self.endInsertRows()
+        except Exception as e:
+            self.logger.error(f"Ошибка при индексировании события: {str(e)}", exc_info=True)
+
+    def update_item(self, item):
+        """
+        Переиндексирует изменившееся событие (продолжение серии, выделение, объединение)
+        и добавляет его в выборку, убирает из нее или перерисовывает его строку
+        """
+        try:
+            if item.seq < self.oldest_seq or item.seq not in self.meta:
+                return
+            self._evict(item.seq)
+            self._index_item(item)
+            position = bisect_left(self.matches, item.seq)
+            listed = position < len(self.matches) and self.matches[position] == item.seq
+            row = len(self.matches) - 1 - position
+            matches = self.filter.is_active and self._matches(item.seq)
+            if listed and matches:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+            elif listed:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.matches[position]
+                self.endRemoveRows()
+            elif matches:
+                # Строки выборки идут от новых к старым: позиция в matches отсчитывается с конца
+                row = len(self.matches) - position
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.matches.insert(position, item.seq)
+                self.endInsertRows()
+        except Exception as e:
+            self.logger.error(f"Ошибка при переиндексировании события: {str(e)}", exc_info=True)
+
+    def on_image_ready(self, key, pixmap):
+        # Значки строк выборки берутся из исходной модели, достаточно перерисовать столбец подарка
+        if self.matches:
+            self.dataChanged.emit(self.index(0, self.GIFT_COLUMN), self.index(len(self.matches) - 1, self.GIFT_COLUMN))
+
+    def clear(self):
+        """Сбрасывает индексы при начале новой сессии мониторинга"""
+        self.beginResetModel()
+        self._reset_indexes()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.matches)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def row_at(self, row):
+        """Возвращает предвычисленную строку исходной модели по номеру строки выборки"""
+        return self.source_model.row_by_seq(self.matches[len(self.matches) - 1 - row])
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self.matches)):
+            return None
+        event_row = self.row_at(index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return event_row.display[index.column()]
+        elif role == Qt.ItemDataRole.DecorationRole:
+            if index.column() == self.GIFT_COLUMN:
+                return event_row.pixmap
+        elif role == Qt.ItemDataRole.BackgroundRole:
+            if event_row.important:
+                return self.IMPORTANT_COLOR
+        return None
+
+    def headerData(self, section, orientation, role):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
@@ -0,0 +1,47 @@
+# events_row_delegate.py
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtCore import Qt, QSize
+
+class EventsRowDelegate(QStyledItemDelegate):
+    """
+    Отрисовывает строки таблицы событий напрямую из предвычисленного кэша модели,
+    минуя цепочку ролей data() и стиль QStyledItemDelegate
+    """
+    ROW_HEIGHT = 36
+    PADDING = 4
+
+    def paint(self, painter, option, index):
+        model = index.model()
+        event_row = model.row_at(index.row())
+        column = index.column()
+        painter.save()
+        try:
+            selected = bool(option.state & QStyle.StateFlag.State_Selected)
+            if selected:
+                painter.fillRect(option.rect, option.palette.highlight())
+                painter.setPen(option.palette.highlightedText().color())
+            else:
+                if event_row.important:
+                    painter.fillRect(option.rect, model.IMPORTANT_COLOR)
+                painter.setPen(option.palette.text().color())
+
+            rect = option.rect.adjusted(self.PADDING, 0, -self.PADDING, 0)
+            if column == model.GIFT_COLUMN and event_row.pixmap is not None:
+                pixmap = event_row.pixmap
+                top = rect.top() + (rect.height() - pixmap.height()) // 2
+                painter.drawPixmap(rect.left(), top, pixmap)
+                rect.setLeft(rect.left() + pixmap.width() + self.PADDING)
+
+            text = event_row.display[column]
+            if text and rect.width() > 0:
+                elided = option.fontMetrics.elidedText(text, Qt.TextElideMode.ElideRight, rect.width())
+                painter.drawText(rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, elided)
+        finally:
+            painter.restore()
+
+    def sizeHint(self, option, index):
+        event_row = index.model().row_at(index.row())
+        width = option.fontMetrics.horizontalAdvance(event_row.display[index.column()]) + 2 * self.PADDING
+        if index.column() == index.model().GIFT_COLUMN and event_row.pixmap is not None:
+            width += event_row.pixmap.width() + self.PADDING
+        return QSize(width, self.ROW_HEIGHT)
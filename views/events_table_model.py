@@ -1,90 +1,215 @@
 # events_table_model.py
+from collections import OrderedDict, deque
 from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
-from PyQt6.QtGui import QPixmap, QImage
-from PyQt6.QtCore import QByteArray
-from models.data_models import TableItemView, AlertLevel
+from PyQt6.QtGui import QColor
+from models.data_models import TableItemView, AlertLevel, EventType
 from utils.logger import Logger
+from .image_decoder import ImageDecoder
 from datetime import datetime
 
+class EventRow:
+    """
+    Предвычисленные данные строки таблицы: формируются один раз при вставке события
+    """
+    __slots__ = ('item', 'display', 'important', 'pixmap')
+
+    def __init__(self, item, pixmap=None):
+        self.item = item
+        self.display = (
+            item.timestamp.strftime("%H:%M:%S"),
+            item.name,
+            item.event,
+            item.alert_level.name,
+            item.gift_name,
+        )
+        self.important = item.alert_level == AlertLevel.IMPORTANT
+        self.pixmap = pixmap
+
+    @classmethod
+    def empty(cls):
+        """Пустая строка-заглушка для событий, которых нет в истории"""
+        row = cls.__new__(cls)
+        row.item = None
+        row.display = ("", "", "", "", "")
+        row.important = False
+        row.pixmap = None
+        return row
+
 class EventsTableModel(QAbstractTableModel):
+    GIFT_COLUMN = 4
+    GIFT_ICON_SIZE = 32
+    IMPORTANT_COLOR = QColor(Qt.GlobalColor.yellow)
+    # Сколько строк догружается из истории за один вызов fetchMore
+    PAGE_SIZE = 200
+    # Сколько страниц истории одновременно хранится в памяти
+    PAGE_CACHE_SIZE = 8
+
     def __init__(self, viewmodel):
         super().__init__()
         self.viewmodel = viewmodel
+        self.history = viewmodel.history_service
         self.headers = ["Время", "Пользователь", "Событие", "Уровень важности", "Подарок"]
         self.logger = Logger().get_logger('EventsTableModel')
         self.logger.info("Инициализация модели таблицы событий")
+        # Изображения подарков декодируются в пуле потоков; до готовности строка показывает заглушку
+        self.decoder = ImageDecoder(self.GIFT_ICON_SIZE, self)
+        self.decoder.image_ready.connect(self.on_image_ready)
+        self.waiting = {}  # изображение -> номера строк, ожидающих декодирования
+        # Окно последних событий в памяти (новые сверху); более старые строки
+        # читаются постранично из истории на диске и кэшируются в LRU страниц
+        self.recent = deque(
+            (EventRow(item, self._pixmap_for(item)) for item in self.viewmodel.item_list),
+            maxlen=self.viewmodel.MAX_ITEMS
+        )
+        self.pages = OrderedDict()
+        self.latest_seq = self.viewmodel.item_list[0].seq if self.viewmodel.item_list else 0
+        self.loaded = len(self.recent)
+        self.session_id = self.history.session_id if self.history else None
+        self._empty_row = EventRow.empty()
         self.viewmodel.item_added.connect(self.add_item)
-    
+        self.viewmodel.item_updated.connect(self.update_item)
+        self.viewmodel.items_cleared.connect(self.clear)
+
     def rowCount(self, parent=QModelIndex()):
-        count = len(self.viewmodel.item_list)
-        self.logger.debug(f"Запрос количества строк: {count}")
-        return count
-    
+        return 0 if parent.isValid() else self.loaded
+
     def columnCount(self, parent=QModelIndex()):
-        count = len(self.headers)
-        self.logger.debug(f"Запрос количества столбцов: {count}")
-        return count
-    
+        return 0 if parent.isValid() else len(self.headers)
+
+    def _history_available(self):
+        return self.history is not None and self.history.available and self.session_id is not None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._history_available():
+            return False
+        return self.loaded < self.latest_seq
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Догружает следующую страницу более старых событий из истории"""
+        if not self.canFetchMore(parent):
+            return
+        count = min(self.PAGE_SIZE, self.latest_seq - self.loaded)
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+        self.logger.debug(f"Догружено {count} строк из истории, всего строк: {self.loaded}")
+
+    def row_at(self, row):
+        """Возвращает предвычисленную строку по номеру"""
+        if row < len(self.recent):
+            return self.recent[row]
+        return self.row_by_seq(self.latest_seq - row)
+
+    def row_by_seq(self, seq):
+        """Возвращает предвычисленную строку по порядковому номеру события в сессии"""
+        offset = self.latest_seq - seq
+        if 0 <= offset < len(self.recent):
+            return self.recent[offset]
+        page_no = (seq - 1) // self.PAGE_SIZE
+        page = self.pages.get(page_no)
+        if page is not None:
+            self.pages.move_to_end(page_no)
+        # Страница могла быть загружена, пока часть ее событий еще была только в памяти
+        if page is None or seq not in page:
+            page = self._load_page(page_no)
+        return page.get(seq, self._empty_row)
+
+    def _load_page(self, page_no):
+        """Читает страницу событий из истории и помещает ее в LRU-кэш"""
+        first = page_no * self.PAGE_SIZE + 1
+        items = self.history.fetch_range(self.session_id, first, first + self.PAGE_SIZE - 1) \
+            if self._history_available() else []
+        page = {item.seq: EventRow(item) for item in items}
+        self.pages[page_no] = page
+        self.pages.move_to_end(page_no)
+        while len(self.pages) > self.PAGE_CACHE_SIZE:
+            self.pages.popitem(last=False)
+        return page
+
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
-        if not index.isValid() or not (0 <= index.row() < len(self.viewmodel.item_list)):
-            self.logger.debug(f"Неверный индекс: {index}")
+        row = index.row()
+        if not index.isValid() or not (0 <= row < self.loaded):
             return None
-        item = self.viewmodel.item_list[index.row()]
+        event_row = self.row_at(row)
         if role == Qt.ItemDataRole.DisplayRole:
-            if index.column() == 0:
-                value = item.timestamp.strftime("%H:%M:%S")
-                self.logger.debug(f"Запрос данных для строки {index.row()}, столбца {index.column()}: {value}")
-                return value
-            elif index.column() == 1:
-                value = item.name
-                self.logger.debug(f"Запрос данных для строки {index.row()}, столбца {index.column()}: {value}")
-                return value
-            elif index.column() == 2:
-                value = item.event
-                self.logger.debug(f"Запрос данных для строки {index.row()}, столбца {index.column()}: {value}")
-                return value
-            elif index.column() == 3:
-                value = item.alert_level.name
-                self.logger.debug(f"Запрос данных для строки {index.row()}, столбца {index.column()}: {value}")
-                return value
-            elif index.column() == 4:
-                value = item.gift_name
-                self.logger.debug(f"Запрос данных для строки {index.row()}, столбца {index.column()}: {value}")
-                return value
+            return event_row.display[index.column()]
         elif role == Qt.ItemDataRole.DecorationRole:
-            if index.column() == 4:
-                if item.gift_image:
-                    pixmap = self.base64_to_pixmap(item.gift_image)
-                    self.logger.debug(f"Запрос изображения для строки {index.row()}, столбца {index.column()}")
-                    return pixmap.scaled(50, 50, Qt.AspectRatioMode.KeepAspectRatio)
+            if index.column() == self.GIFT_COLUMN:
+                return event_row.pixmap
         elif role == Qt.ItemDataRole.BackgroundRole:
-            if item.alert_level == AlertLevel.IMPORTANT:
-                self.logger.debug(f"Запрос фона для строки {index.row()} с уровнем важности: {item.alert_level}")
-                return Qt.GlobalColor.yellow
+            if event_row.important:
+                return self.IMPORTANT_COLOR
         return None
-    
+
     def headerData(self, section, orientation, role):
         if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
-            value = self.headers[section]
-            self.logger.debug(f"Запрос заголовка для секции {section}: {value}")
-            return value
+            return self.headers[section]
         return None
-    
-    def base64_to_pixmap(self, base64_string):
-        image_data = QByteArray.fromBase64(base64_string.encode('utf-8'))
-        image = QImage()
-        image.loadFromData(image_data)
-        pixmap = QPixmap.fromImage(image)
-        self.logger.debug(f"Преобразование изображения из base64")
-        return pixmap
-    
+
+    def _pixmap_for(self, item):
+        """
+        Возвращает значок подарка без декодирования в потоке GUI: готовый из кэша декодера
+        или заглушку, которая заменяется в on_image_ready. Подарок без изображения
+        (еще не загружено или загрузка не удалась) получает значок "нет изображения"
+        """
+        if not item.gift_image:
+            return self.decoder.no_image if item.event_type == EventType.GIFT else None
+        if not self.decoder.is_ready(item.gift_image):
+            self.waiting.setdefault(item.gift_image, set()).add(item.seq)
+        return self.decoder.get(item.gift_image) or self.decoder.no_image
+
+    def on_image_ready(self, key, pixmap):
+        """Подставляет декодированное изображение в ожидавшие его строки"""
+        rows = []
+        for seq in self.waiting.pop(key, ()):
+            row = self.latest_seq - seq
+            if 0 <= row < len(self.recent) and self.recent[row].item.gift_image == key:
+                self.recent[row].pixmap = pixmap or self.decoder.no_image
+                rows.append(row)
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), self.GIFT_COLUMN), self.index(max(rows), self.GIFT_COLUMN))
+
     def add_item(self, item):
-        """Добавляет новое событие в список и уведомляет модель о добавлении строки"""
+        """Добавляет строку для нового события (само событие уже добавлено во viewmodel.item_list)"""
         try:
-            row = len(self.viewmodel.item_list)
-            self.beginInsertRows(QModelIndex(), row, row)
-            self.viewmodel.item_list.insert(0, item)  # Вставляем в начало списка
+            self.beginInsertRows(QModelIndex(), 0, 0)
+            self.recent.appendleft(EventRow(item, self._pixmap_for(item)))
+            self.latest_seq = item.seq
+            self.loaded += 1
             self.endInsertRows()
-            self.logger.debug(f"Добавлено новое событие: {item.timestamp} - {item.name} - {item.event}")
+            # Без истории на диске строки за пределами окна в памяти показать нельзя
+            if not self._history_available() and self.loaded > len(self.recent):
+                self.beginRemoveRows(QModelIndex(), len(self.recent), self.loaded - 1)
+                self.loaded = len(self.recent)
+                self.endRemoveRows()
         except Exception as e:
             self.logger.error(f"Ошибка при добавлении события в модель: {str(e)}", exc_info=True)
+
+    def update_item(self, item):
+        """Перерисовывает строку события, изменившегося после вставки (например, серии подарков)"""
+        try:
+            row = self.latest_seq - item.seq
+            if 0 <= row < len(self.recent):
+                old = self.recent[row]
+                pixmap = old.pixmap if old.item.gift_image == item.gift_image else self._pixmap_for(item)
+                self.recent[row] = EventRow(item, pixmap)
+            else:
+                page = self.pages.get((item.seq - 1) // self.PAGE_SIZE)
+                if page is None or item.seq not in page:
+                    return
+                page[item.seq] = EventRow(item)
+            if row < self.loaded:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+        except Exception as e:
+            self.logger.error(f"Ошибка при обновлении события в модели: {str(e)}", exc_info=True)
+
+    def clear(self):
+        """Очищает таблицу при начале новой сессии мониторинга"""
+        self.beginResetModel()
+        self.recent.clear()
+        self.pages.clear()
+        self.waiting.clear()
+        self.latest_seq = 0
+        self.loaded = 0
+        self.session_id = self.history.session_id if self.history else None
+        self.endResetModel()
@@ -0,0 +1,62 @@
+# history_search_dialog.py
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QTableView, QLabel, QAbstractItemView
+from PyQt6.QtGui import QStandardItemModel, QStandardItem
+from utils.error_handler import ErrorHandler
+from utils.logger import Logger
+
+class HistorySearchDialog(QDialog):
+    """
+    Полнотекстовый поиск по комментариям всех сохраненных стримов
+    """
+    def __init__(self, history_service, parent=None):
+        super().__init__(parent)
+        self.history_service = history_service
+        self.error_handler = ErrorHandler()
+        self.logger = Logger().get_logger('HistorySearchDialog')
+        self.init_ui()
+
+    def init_ui(self):
+        """Инициализирует интерфейс окна поиска"""
+        self.setWindowTitle("Поиск по истории комментариев")
+        self.resize(700, 500)
+        layout = QVBoxLayout()
+        search_layout = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText('Слова, "точная фраза" или префикс*')
+        self.query_input.returnPressed.connect(self.search)
+        search_btn = QPushButton("Найти")
+        search_btn.clicked.connect(self.search)
+        search_layout.addWidget(self.query_input, 1)
+        search_layout.addWidget(search_btn)
+        layout.addLayout(search_layout)
+        self.results_model = QStandardItemModel(0, 3)
+        self.results_model.setHorizontalHeaderLabels(["Время", "Пользователь", "Комментарий"])
+        self.results_view = QTableView()
+        self.results_view.setModel(self.results_model)
+        self.results_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.results_view.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.results_view, 1)
+        self.result_label = QLabel("")
+        layout.addWidget(self.result_label)
+        self.setLayout(layout)
+
+    def search(self):
+        """Выполняет поиск и показывает результаты, новые сначала"""
+        try:
+            query = self.query_input.text().strip()
+            if not query:
+                return
+            items = self.history_service.search_comments(query)
+            self.results_model.removeRows(0, self.results_model.rowCount())
+            for item in items:
+                self.results_model.appendRow([
+                    QStandardItem(item.timestamp.strftime("%Y-%m-%d %H:%M:%S")),
+                    QStandardItem(item.name),
+                    QStandardItem(item.event),
+                ])
+            self.results_view.resizeColumnToContents(0)
+            self.result_label.setText(f"Найдено: {len(items)}")
+        except Exception as e:
+            self.logger.error(f"Ошибка при поиске по истории: {str(e)}", exc_info=True)
+            self.error_handler.show_error_dialog(self, "Ошибка поиска",
+                                                 "Не удалось выполнить поиск по истории", str(e))
@@ -0,0 +1,87 @@
+# image_decoder.py
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap, QColor, QPainter
+from utils.logger import Logger
+
+class _DecodeSignals(QObject):
+    # Ключ изображения, декодированное изображение (пустое при ошибке)
+    decoded = pyqtSignal(str, QImage)
+
+class _DecodeTask(QRunnable):
+    """Декодирует base64-изображение в пуле потоков, сразу уменьшая его до нужного размера"""
+    def __init__(self, key, size, signals):
+        super().__init__()
+        self.key = key
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        buffer = QBuffer()
+        buffer.setData(QByteArray.fromBase64(self.key.encode('utf-8')))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        reader = QImageReader(buffer)
+        size = reader.size()
+        if size.isValid() and (size.width() > self.size or size.height() > self.size):
+            # Масштабирование при чтении дешевле, чем декодирование полного изображения
+            reader.setScaledSize(size.scaled(self.size, self.size, Qt.AspectRatioMode.KeepAspectRatio))
+        self.signals.decoded.emit(self.key, reader.read())
+
+class ImageDecoder(QObject):
+    """
+    Асинхронное декодирование изображений для таблицы событий.
+    Декодирование выполняется в QThreadPool, в потоке GUI из готового QImage создается только QPixmap.
+    Одинаковые изображения (один и тот же подарок) декодируются один раз
+    """
+    # Изображение декодировано: ключ (base64-строка), QPixmap или None при ошибке
+    image_ready = pyqtSignal(str, object)
+    # Сколько декодированных изображений хранится в памяти
+    CACHE_SIZE = 512
+
+    def __init__(self, size, parent=None):
+        super().__init__(parent)
+        self.logger = Logger().get_logger('ImageDecoder')
+        self.size = size
+        self.cache = OrderedDict()
+        self.pending = set()
+        self.pool = QThreadPool.globalInstance()
+        self.signals = _DecodeSignals()
+        self.signals.decoded.connect(self.on_decoded)
+        self.placeholder = QPixmap(size, size)
+        self.placeholder.fill(QColor(0, 0, 0, 30))
+        # Значок для подарков, изображение которых загрузить или декодировать не удалось
+        self.no_image = QPixmap(size, size)
+        self.no_image.fill(QColor(0, 0, 0, 0))
+        painter = QPainter(self.no_image)
+        painter.setPen(QColor(128, 128, 128))
+        painter.drawRect(0, 0, size - 1, size - 1)
+        painter.drawText(self.no_image.rect(), Qt.AlignmentFlag.AlignCenter, "?")
+        painter.end()
+
+    def get(self, key):
+        """
+        Возвращает готовый QPixmap (или None, если изображение не декодируется).
+        Если изображение еще не декодировано, ставит его в очередь и возвращает заглушку
+        """
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        if key not in self.pending:
+            self.pending.add(key)
+            self.pool.start(_DecodeTask(key, self.size, self.signals))
+        return self.placeholder
+
+    def is_ready(self, key):
+        return key in self.cache
+
+    def on_decoded(self, key, image):
+        self.pending.discard(key)
+        if image.isNull():
+            self.logger.warning("Не удалось декодировать изображение подарка")
+            pixmap = None
+        else:
+            pixmap = QPixmap.fromImage(image)
+        self.cache[key] = pixmap
+        while len(self.cache) > self.CACHE_SIZE:
+            self.cache.popitem(last=False)
+        self.image_ready.emit(key, pixmap)
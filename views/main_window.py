@@ -1,7 +1,7 @@
 import os
 import asyncio
 import threading
-from PyQt6.QtWidgets import QMainWindow, QTabWidget, QMessageBox, QFileDialog
+from PyQt6.QtWidgets import QMainWindow, QTabWidget, QMessageBox, QFileDialog, QWidget, QVBoxLayout
 from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
 from PyQt6.QtGui import QStandardItemModel, QStandardItem, QPixmap, QImage
 from PyQt6 import sip
@@ -17,6 +17,9 @@ from datetime import datetime
 from views.monitoring_tab import MonitoringTab
 from views.settings_tab import SettingsTab
 from views.sounds_tab import SoundsTab
+from views.stats_tab import StatsTab
+from views.error_feed import ErrorFeed
+from views.triggers_tab import TriggersTab
 from views.events_table_model import EventsTableModel  # Импортируем EventsTableModel из отдельного файла
 
 class MainWindow(QMainWindow):
@@ -45,8 +48,17 @@ class MainWindow(QMainWindow):
             self.tabs.addTab(self.monitoring_tab, "Мониторинг")
             self.tabs.addTab(SettingsTab(self.viewmodel, self), "Настройки")
             self.tabs.addTab(SoundsTab(self.viewmodel, self), "Звуки")
+            self.tabs.addTab(TriggersTab(self.viewmodel, self), "Триггеры")
+            self.tabs.addTab(StatsTab(self.viewmodel, self), "Статистика")
+            # Лента ошибок под вкладками вместо каскада модальных диалогов
+            self.error_feed = ErrorFeed(self)
+            central_widget = QWidget()
+            central_layout = QVBoxLayout()
+            central_layout.addWidget(self.tabs, 1)
+            central_layout.addWidget(self.error_feed)
+            central_widget.setLayout(central_layout)
             # Устанавливаем основной виджет
-            self.setCentralWidget(self.tabs)
+            self.setCentralWidget(central_widget)
             self.logger.debug("Интерфейс инициализирован")
         except Exception as e:
             self.logger.error(f"Ошибка инициализации интерфейса: {str(e)}", exc_info=True)
@@ -193,6 +205,8 @@ class MainWindow(QMainWindow):
             self.viewmodel.settings.notify_delay = self.monitoring_tab.delay_input.value()
             # Сохраняем настройки
             asyncio.run(self.viewmodel.settings.save())
+            # Тексты озвучивания лайков и подключений входят в правила
+            self.viewmodel.reload_rules()
             self.logger.info("Настройки успешно сохранены")
             QMessageBox.information(self, "Настройки", "Настройки успешно сохранены")
         except Exception as e:
@@ -299,6 +313,11 @@ class MainWindow(QMainWindow):
             if hasattr(self, 'table_model') and self.table_model:
                 self.logger.debug("Освобождение ресурсов таблицы")
                 self.table_view.setModel(None)  # Отсоединяем модель от представления
+            if self.viewmodel.history_service:
+                self.viewmodel.history_service.close()
+            self.viewmodel.gift_service.close()
+            self.viewmodel.speech_service.close()
+            self.viewmodel.sound_service.close()
             # Вызываем стандартный обработчик закрытия окна
             super().closeEvent(event)
         except Exception as e:
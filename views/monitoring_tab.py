@@ -1,14 +1,35 @@
 # monitoring_tab.py
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel, QCheckBox, QTableView
-from PyQt6.QtCore import Qt, QModelIndex
-from models.data_models import AlertLevel, TableItemView, GiftData
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel, QCheckBox, QTableView, QHeaderView, QComboBox
+from PyQt6.QtCore import Qt, QModelIndex, QTimer
+from models.data_models import AlertLevel, TableItemView, GiftData, EventType
 from utils.error_handler import ErrorHandler
 from utils.logger import Logger
 from PyQt6 import sip
 from datetime import datetime
 from .events_table_model import EventsTableModel  # Импортируем EventsTableModel из отдельного файла
+from .events_row_delegate import EventsRowDelegate
+from .events_filter_model import EventsFilterModel, EventFilter
+from .history_search_dialog import HistorySearchDialog
 
 class MonitoringTab(QWidget):
+    # Ширина столбцов подбирается по первым строкам, а не по всему содержимому
+    COLUMN_SAMPLE_ROWS = 50
+    # Задержка применения фильтра после ввода текста (мс)
+    FILTER_DELAY = 200
+    EVENT_TYPE_FILTERS = [
+        ("Все события", None),
+        ("Комментарии", EventType.COMMENT),
+        ("Подарки", EventType.GIFT),
+        ("Лайки", EventType.LIKE),
+        ("Подключения", EventType.JOIN),
+        ("Системные", EventType.SYSTEM),
+    ]
+    ALERT_LEVEL_FILTERS = [
+        ("Любая важность", None),
+        ("NORMAL", AlertLevel.NORMAL),
+        ("IMPORTANT", AlertLevel.IMPORTANT),
+    ]
+
     def __init__(self, viewmodel, parent=None):
         super().__init__(parent)
         self.viewmodel = viewmodel
@@ -53,11 +74,48 @@ class MonitoringTab(QWidget):
             checks_layout.addWidget(self.speech_member_chk)
             layout.addLayout(checks_layout)
             self.logger.debug("Созданы чекбоксы для настроек")
+            # Фильтр таблицы событий
+            filter_layout = QHBoxLayout()
+            self.type_filter_combo = QComboBox()
+            for title, _ in self.EVENT_TYPE_FILTERS:
+                self.type_filter_combo.addItem(title)
+            self.level_filter_combo = QComboBox()
+            for title, _ in self.ALERT_LEVEL_FILTERS:
+                self.level_filter_combo.addItem(title)
+            self.user_filter_input = QLineEdit()
+            self.user_filter_input.setPlaceholderText("Пользователь")
+            self.text_filter_input = QLineEdit()
+            self.text_filter_input.setPlaceholderText("Поиск по комментариям")
+            filter_layout.addWidget(QLabel("Фильтр:"))
+            filter_layout.addWidget(self.type_filter_combo)
+            filter_layout.addWidget(self.level_filter_combo)
+            filter_layout.addWidget(self.user_filter_input)
+            filter_layout.addWidget(self.text_filter_input, 1)
+            self.history_search_btn = QPushButton("Поиск в истории")
+            history = self.viewmodel.history_service
+            self.history_search_btn.setEnabled(bool(history and history.available and history.fts_available))
+            filter_layout.addWidget(self.history_search_btn)
+            layout.addLayout(filter_layout)
+            self.filter_timer = QTimer(self)
+            self.filter_timer.setSingleShot(True)
+            self.filter_timer.setInterval(self.FILTER_DELAY)
+            self.logger.debug("Создана строка фильтра событий")
             # Таблица событий
             self.table_model = EventsTableModel(self.viewmodel)
+            # Модель фильтра создается после основной, чтобы получать события вторым
+            self.filter_model = EventsFilterModel(self.table_model, self.viewmodel)
             self.table_view = QTableView()
             self.table_view.setModel(self.table_model)
-            self.table_view.horizontalHeader().setStretchLastSection(True)
+            self.table_view.setItemDelegate(EventsRowDelegate(self.table_view))
+            # Одинаковая высота строк: представлению не нужно измерять каждую строку
+            vertical_header = self.table_view.verticalHeader()
+            vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+            vertical_header.setDefaultSectionSize(EventsRowDelegate.ROW_HEIGHT)
+            horizontal_header = self.table_view.horizontalHeader()
+            horizontal_header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+            horizontal_header.setResizeContentsPrecision(self.COLUMN_SAMPLE_ROWS)
+            horizontal_header.setStretchLastSection(True)
+            self.table_view.resizeColumnsToContents()
             layout.addWidget(self.table_view, 1)
             self.logger.debug("Создана таблица событий")
             # Статус
@@ -80,13 +138,59 @@ class MonitoringTab(QWidget):
             self.speech_like_chk.clicked.connect(self.toggle_speech_like)
             self.speech_member_chk.clicked.connect(self.toggle_speech_member)
             self.viewmodel.status_changed.connect(self.update_status_label)
-            self.viewmodel.item_added.connect(self.table_model.add_item)
+            self.table_model.rowsInserted.connect(self.autosize_columns)
+            self.type_filter_combo.currentIndexChanged.connect(self.apply_filter)
+            self.level_filter_combo.currentIndexChanged.connect(self.apply_filter)
+            self.user_filter_input.textChanged.connect(self.filter_timer.start)
+            self.text_filter_input.textChanged.connect(self.filter_timer.start)
+            self.filter_timer.timeout.connect(self.apply_filter)
+            self.history_search_btn.clicked.connect(self.open_history_search)
             self.logger.debug("Обработчики событий привязаны")
         except Exception as e:
             self.logger.error(f"Ошибка при привязке обработчиков событий: {str(e)}", exc_info=True)
             self.error_handler.show_error_dialog(self, "Ошибка инициализации", 
                                                  "Не удалось привязать обработчики событий", str(e))
 
+    def autosize_columns(self, parent=None, first=0, last=0):
+        """
+        Подбирает ширину столбцов по первым строкам, пока их не больше размера выборки
+        """
+        if self.table_model.rowCount() <= self.COLUMN_SAMPLE_ROWS:
+            self.table_view.resizeColumnsToContents()
+
+    def apply_filter(self):
+        """
+        Применяет фильтр таблицы событий; без фильтра показывается основная модель
+        """
+        try:
+            event_filter = EventFilter(
+                event_type=self.EVENT_TYPE_FILTERS[self.type_filter_combo.currentIndex()][1],
+                alert_level=self.ALERT_LEVEL_FILTERS[self.level_filter_combo.currentIndex()][1],
+                user=self.user_filter_input.text().strip(),
+                text=self.text_filter_input.text().strip()
+            )
+            self.filter_model.set_filter(event_filter)
+            model = self.filter_model if event_filter.is_active else self.table_model
+            if self.table_view.model() is not model:
+                self.table_view.setModel(model)
+            self.logger.debug(f"Фильтр событий обновлен: {event_filter}")
+        except Exception as e:
+            self.logger.error(f"Ошибка при применении фильтра событий: {str(e)}", exc_info=True)
+            self.error_handler.show_error_dialog(self, "Ошибка фильтра",
+                                                 "Не удалось применить фильтр событий", str(e))
+
+    def open_history_search(self):
+        """
+        Открывает окно полнотекстового поиска по истории комментариев
+        """
+        try:
+            dialog = HistorySearchDialog(self.viewmodel.history_service, self)
+            dialog.exec()
+        except Exception as e:
+            self.logger.error(f"Ошибка при открытии поиска по истории: {str(e)}", exc_info=True)
+            self.error_handler.show_error_dialog(self, "Ошибка поиска",
+                                                 "Не удалось открыть поиск по истории", str(e))
+
     def update_monitoring_state(self):
         """
         Обновляет состояние интерфейса в зависимости от статуса мониторинга
@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit, QLabel, QCheckBox, QComboBox, QSlider, QSpinBox, QMessageBox
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
 from models.data_models import AlertLevel, TableItemView, GiftData
 from utils.error_handler import ErrorHandler
 from utils.logger import Logger
@@ -7,6 +7,19 @@ from PyQt6 import sip
 from datetime import datetime
 import asyncio
 
+class _VoicesSignals(QObject):
+    loaded = pyqtSignal(list)
+
+class _VoicesTask(QRunnable):
+    """Получает список голосов в пуле потоков: процесс синтеза речи может еще запускаться"""
+    def __init__(self, speech_service, signals):
+        super().__init__()
+        self.speech_service = speech_service
+        self.signals = signals
+
+    def run(self):
+        self.signals.loaded.emit(self.speech_service.get_voices())
+
 class SettingsTab(QWidget):
     def __init__(self, viewmodel, parent=None):
         super().__init__(parent)
@@ -18,6 +31,23 @@ class SettingsTab(QWidget):
         self.bind_events()
         self.logger.debug("Вкладка настроек инициализирована")
 
+    def on_voices_loaded(self, voices):
+        """Заполняет список голосов, сохраняя выбранный голос"""
+        try:
+            if sip.isdeleted(self.voice_combo):
+                return
+            current_voice = self.voice_combo.currentText() or self.viewmodel.settings.speech_voice
+            self.voice_combo.clear()
+            self.voice_combo.addItem("")
+            self.voice_combo.addItems(voices)
+            # Устанавливаем текущий голос, если он задан
+            if current_voice and current_voice in voices:
+                self.voice_combo.setCurrentText(current_voice)
+            self.logger.debug(f"Загружено {len(voices)} голосов")
+        except Exception as e:
+            self.logger.error(f"Ошибка получения списка голосов: {str(e)}", exc_info=True)
+            self.error_handler.handle_file_error(self, e, "voices")
+
     def init_ui(self):
         """Инициализирует пользовательский интерфейс вкладки настроек"""
         try:
@@ -26,18 +56,11 @@ class SettingsTab(QWidget):
             voice_layout = QHBoxLayout()
             voice_layout.addWidget(QLabel("Голос:"))
             self.voice_combo = QComboBox()
-            try:
-                # Получаем список доступных голосов
-                voices = self.viewmodel.speech_service.get_voices()
-                self.voice_combo.addItem("") # Пустой вариант для значения по умолчанию
-                self.voice_combo.addItems(voices)
-                # Устанавливаем текущий голос, если он задан
-                current_voice = self.viewmodel.settings.speech_voice
-                if current_voice and current_voice in voices:
-                    self.voice_combo.setCurrentText(current_voice)
-            except Exception as e:
-                self.logger.error(f"Ошибка получения списка голосов: {str(e)}", exc_info=True)
-                self.error_handler.handle_file_error(self, e, "voices")
+            self.voice_combo.addItem("") # Пустой вариант для значения по умолчанию
+            # Список голосов заполняется, когда синтезатор его вернет
+            self.voices_signals = _VoicesSignals()
+            self.voices_signals.loaded.connect(self.on_voices_loaded)
+            QThreadPool.globalInstance().start(_VoicesTask(self.viewmodel.speech_service, self.voices_signals))
             voice_layout.addWidget(self.voice_combo, 1)
             layout.addLayout(voice_layout)
             self.logger.debug("Создана строка для выбора голоса")
@@ -201,6 +224,8 @@ class SettingsTab(QWidget):
             self.viewmodel.settings.notify_delay = self.delay_input.value()
             # Сохраняем настройки
             asyncio.run(self.viewmodel.settings.save())
+            # Тексты озвучивания лайков и подключений входят в правила
+            self.viewmodel.reload_rules()
             self.logger.info("Настройки успешно сохранены")
             QMessageBox.information(self, "Настройки", "Настройки успешно сохранены")
         except Exception as e:
@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox, QSpinBox, QListView, QAbstractItemView, QMessageBox, QFileDialog
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
 from PyQt6.QtGui import QStandardItemModel, QStandardItem
 from PyQt6 import sip
 from models.data_models import AlertLevel, TableItemView, GiftData
@@ -7,7 +7,26 @@ from utils.error_handler import ErrorHandler
 from utils.logger import Logger
 from datetime import datetime
 import os
-import shutil
+
+class _ImportSignals(QObject):
+    # Исходный путь, имя файла в assets
+    imported = pyqtSignal(str, str)
+    # Исходный путь, текст ошибки
+    failed = pyqtSignal(str, str)
+
+class _ImportTask(QRunnable):
+    """Проверяет и импортирует звуковой файл в пуле потоков"""
+    def __init__(self, sound_service, file_path, signals):
+        super().__init__()
+        self.sound_service = sound_service
+        self.file_path = file_path
+        self.signals = signals
+
+    def run(self):
+        try:
+            self.signals.imported.emit(self.file_path, self.sound_service.import_sound(self.file_path))
+        except Exception as e:
+            self.signals.failed.emit(self.file_path, str(e))
 
 class SoundsTab(QWidget):
     def __init__(self, viewmodel, parent=None):
@@ -28,9 +47,11 @@ class SoundsTab(QWidget):
             layout = QVBoxLayout()
             # Панель для загрузки звуков
             upload_layout = QHBoxLayout()
-            upload_btn = QPushButton("Загрузить звук")
-            upload_btn.clicked.connect(self.upload_sound)
-            upload_layout.addWidget(upload_btn)
+            self.upload_btn = QPushButton("Загрузить звук")
+            self.upload_btn.clicked.connect(self.upload_sound)
+            upload_layout.addWidget(self.upload_btn)
+            self.import_status = QLabel()
+            upload_layout.addWidget(self.import_status)
             upload_layout.addStretch(1)
             layout.addLayout(upload_layout)
             self.logger.debug("Создана панель для загрузки звуков")
@@ -74,6 +95,9 @@ class SoundsTab(QWidget):
     def bind_events(self):
         """Привязывает обработчики событий к изменениям ViewModel"""
         try:
+            self.import_signals = _ImportSignals()
+            self.import_signals.imported.connect(self.on_sound_imported)
+            self.import_signals.failed.connect(self.on_sound_import_failed)
             self.logger.debug("Обработчики событий привязаны")
         except Exception as e:
             self.logger.error(f"Ошибка при привязке обработчиков событий: {str(e)}", exc_info=True)
@@ -115,34 +139,45 @@ class SoundsTab(QWidget):
                                                  "Не удалось обновить список привязок", str(e))
 
     def upload_sound(self):
-        """Загружает новый звуковой файл"""
+        """
+        Загружает новый звуковой файл. Файл проверяется, перекодируется в формат микшера
+        и выравнивается по громкости в фоновом потоке
+        """
         try:
             file_path, _ = QFileDialog.getOpenFileName(
-                self, "Выберите звуковой файл", "", "Аудио файлы (*.mp3 *.wav)"
+                self, "Выберите звуковой файл", "", "Аудио файлы (*.mp3 *.wav *.ogg)"
             )
             if not file_path:
                 return
-            # Копируем файл в директорию assets
-            file_name = os.path.basename(file_path)
-            destination = os.path.join("assets", file_name)
-            try:
-                # Проверяем, существует ли директория assets
-                if not os.path.exists("assets"):
-                    os.makedirs("assets")
-                # Копируем файл
-                shutil.copy2(file_path, destination)
-                self.logger.info(f"Звуковой файл загружен: {file_name}")
-                # Обновляем списки
-                self.update_sounds_list()
-                QMessageBox.information(self, "Загрузка звука", f"Файл {file_name} успешно загружен")
-            except Exception as e:
-                self.logger.error(f"Ошибка при копировании звукового файла: {str(e)}", exc_info=True)
-                self.error_handler.handle_file_error(self, e, destination)
+            self.upload_btn.setEnabled(False)
+            self.import_status.setText(f"Обработка {os.path.basename(file_path)}...")
+            QThreadPool.globalInstance().start(
+                _ImportTask(self.viewmodel.sound_service, file_path, self.import_signals))
         except Exception as e:
             self.logger.error(f"Ошибка при загрузке звука: {str(e)}", exc_info=True)
             self.error_handler.show_error_dialog(self, "Ошибка загрузки звука", 
                                                  "Не удалось загрузить звуковой файл", str(e))
 
+    def on_sound_imported(self, file_path, sound):
+        self.upload_btn.setEnabled(True)
+        self.import_status.clear()
+        self.logger.info(f"Звуковой файл загружен: {sound}")
+        self.update_sounds_list()
+        self.update_mappings_list()
+        original = os.path.basename(file_path)
+        message = f"Файл {original} успешно загружен как {sound}"
+        if sound != original:
+            message += ("\n\nЗвуки сохраняются в формате WAV; если файл с таким именем уже был, "
+                        "к имени добавляется номер. Привязки к звуку с именем исходного файла перенесены на новый")
+        QMessageBox.information(self, "Загрузка звука", message)
+
+    def on_sound_import_failed(self, file_path, error):
+        self.upload_btn.setEnabled(True)
+        self.import_status.clear()
+        self.logger.error(f"Ошибка при импорте звукового файла {file_path}: {error}")
+        self.error_handler.show_error_dialog(self, "Ошибка загрузки звука",
+                                             f"Не удалось загрузить файл {os.path.basename(file_path)}", error)
+
     def add_sound_mapping(self):
         """Добавляет новую привязку звука к ID подарка"""
         try:
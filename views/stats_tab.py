@@ -0,0 +1,115 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QSpinBox, QTableView, QAbstractItemView, QFileDialog, QMessageBox
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QStandardItemModel, QStandardItem
+from utils.error_handler import ErrorHandler
+from utils.logger import Logger
+
+class StatsTab(QWidget):
+    # Интервал обновления рейтинга (мс)
+    REFRESH_INTERVAL = 2000
+
+    def __init__(self, viewmodel, parent=None):
+        super().__init__(parent)
+        self.viewmodel = viewmodel
+        self.stats_service = viewmodel.stats_service
+        self.error_handler = ErrorHandler()
+        self.logger = Logger().get_logger('StatsTab')
+        self.logger.info("Инициализация вкладки статистики")
+        self.init_ui()
+        self.bind_events()
+        self.logger.debug("Вкладка статистики инициализирована")
+
+    def init_ui(self):
+        """Инициализирует пользовательский интерфейс вкладки статистики"""
+        try:
+            layout = QVBoxLayout()
+            top_layout = QHBoxLayout()
+            top_layout.addWidget(QLabel("Топ дарителей:"))
+            self.top_count_input = QSpinBox()
+            self.top_count_input.setRange(1, 500)
+            self.top_count_input.setValue(20)
+            top_layout.addWidget(self.top_count_input)
+            top_layout.addStretch(1)
+            self.export_btn = QPushButton("Экспорт в CSV")
+            top_layout.addWidget(self.export_btn)
+            layout.addLayout(top_layout)
+            self.leaderboard_model = QStandardItemModel(0, 6)
+            self.leaderboard_model.setHorizontalHeaderLabels(
+                ["№", "Пользователь", "Алмазы", "Подарки", "Лайки", "Комментарии"]
+            )
+            self.leaderboard_view = QTableView()
+            self.leaderboard_view.setModel(self.leaderboard_model)
+            self.leaderboard_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            self.leaderboard_view.verticalHeader().setVisible(False)
+            self.leaderboard_view.horizontalHeader().setStretchLastSection(True)
+            layout.addWidget(self.leaderboard_view, 1)
+            self.summary_label = QLabel("")
+            layout.addWidget(self.summary_label)
+            self.setLayout(layout)
+            self.refresh_timer = QTimer(self)
+            self.refresh_timer.setInterval(self.REFRESH_INTERVAL)
+        except Exception as e:
+            self.logger.error(f"Ошибка при создании вкладки статистики: {str(e)}", exc_info=True)
+            self.error_handler.show_error_dialog(self, "Ошибка создания интерфейса",
+                                                 "Не удалось создать вкладку статистики", str(e))
+
+    def bind_events(self):
+        """Привязывает обработчики событий"""
+        try:
+            self.refresh_timer.timeout.connect(self.refresh)
+            self.top_count_input.valueChanged.connect(self.refresh)
+            self.export_btn.clicked.connect(self.export_stats)
+            self.logger.debug("Обработчики событий привязаны")
+        except Exception as e:
+            self.logger.error(f"Ошибка при привязке обработчиков событий: {str(e)}", exc_info=True)
+            self.error_handler.show_error_dialog(self, "Ошибка инициализации",
+                                                 "Не удалось привязать обработчики событий", str(e))
+
+    def showEvent(self, event):
+        # Рейтинг обновляется только пока вкладка видна
+        super().showEvent(event)
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.refresh_timer.stop()
+
+    def refresh(self):
+        """Обновляет таблицу рейтинга и итоги сессии"""
+        try:
+            if not self.stats_service:
+                return
+            top = self.stats_service.top_gifters(self.top_count_input.value())
+            self.leaderboard_model.removeRows(0, self.leaderboard_model.rowCount())
+            for place, stats in enumerate(top, 1):
+                self.leaderboard_model.appendRow([
+                    QStandardItem(str(place)),
+                    QStandardItem(f"{stats.nickname} (@{stats.user_id})"),
+                    QStandardItem(str(stats.diamonds)),
+                    QStandardItem(str(stats.gift_count)),
+                    QStandardItem(str(stats.likes)),
+                    QStandardItem(str(stats.comments)),
+                ])
+            summary = self.stats_service.summary()
+            self.summary_label.setText(
+                f"Пользователей: {summary['users']}, подарков: {summary['gifts']}, "
+                f"алмазов: {summary['diamonds']}, лайков: {summary['likes']}, "
+                f"комментариев: {summary['comments']}"
+            )
+        except Exception as e:
+            self.logger.error(f"Ошибка при обновлении статистики: {str(e)}", exc_info=True)
+
+    def export_stats(self):
+        """Сохраняет статистику сессии в CSV"""
+        try:
+            path, _ = QFileDialog.getSaveFileName(self, "Сохранить статистику", "", "CSV файлы (*.csv)")
+            if not path:
+                return
+            if self.stats_service.export_csv(path):
+                QMessageBox.information(self, "Экспорт статистики", f"Статистика сохранена в {path}")
+            else:
+                self.error_handler.show_validation_error(self, "Нет данных для экспорта")
+        except Exception as e:
+            self.logger.error(f"Ошибка при экспорте статистики: {str(e)}", exc_info=True)
+            self.error_handler.handle_file_error(self, e, "stats")
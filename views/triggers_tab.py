@@ -0,0 +1,103 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTableWidget, QTableWidgetItem, QComboBox, QHeaderView, QMessageBox
+from PyQt6.QtCore import Qt
+from services.trigger_service import TriggerRule
+from utils.error_handler import ErrorHandler
+from utils.logger import Logger
+
+class TriggersTab(QWidget):
+    PHRASE_COLUMN = 0
+    SOUND_COLUMN = 1
+    SPEECH_COLUMN = 2
+    HIGHLIGHT_COLUMN = 3
+
+    def __init__(self, viewmodel, parent=None):
+        super().__init__(parent)
+        self.viewmodel = viewmodel
+        self.trigger_service = viewmodel.rule_engine.trigger_service
+        self.error_handler = ErrorHandler()
+        self.logger = Logger().get_logger('TriggersTab')
+        self.logger.info("Инициализация вкладки триггеров")
+        self.init_ui()
+        self.load_rules()
+        self.logger.debug("Вкладка триггеров инициализирована")
+
+    def init_ui(self):
+        """Инициализирует пользовательский интерфейс вкладки триггеров"""
+        try:
+            layout = QVBoxLayout()
+            layout.addWidget(QLabel("Реакции на слова и фразы в комментариях "
+                                    "(в тексте озвучивания @name - пользователь, @comment - комментарий):"))
+            self.rules_table = QTableWidget(0, 4)
+            self.rules_table.setHorizontalHeaderLabels(["Фраза", "Звук", "Текст для озвучивания", "Выделить"])
+            self.rules_table.horizontalHeader().setSectionResizeMode(self.SPEECH_COLUMN, QHeaderView.ResizeMode.Stretch)
+            layout.addWidget(self.rules_table, 1)
+            buttons_layout = QHBoxLayout()
+            add_btn = QPushButton("Добавить")
+            add_btn.clicked.connect(lambda: self.add_row(TriggerRule("")))
+            remove_btn = QPushButton("Удалить")
+            remove_btn.clicked.connect(self.remove_selected)
+            save_btn = QPushButton("Сохранить триггеры")
+            save_btn.clicked.connect(self.save_rules)
+            buttons_layout.addWidget(add_btn)
+            buttons_layout.addWidget(remove_btn)
+            buttons_layout.addStretch(1)
+            buttons_layout.addWidget(save_btn)
+            layout.addLayout(buttons_layout)
+            self.setLayout(layout)
+        except Exception as e:
+            self.logger.error(f"Ошибка при создании вкладки триггеров: {str(e)}", exc_info=True)
+            self.error_handler.show_error_dialog(self, "Ошибка создания интерфейса",
+                                                 "Не удалось создать вкладку триггеров", str(e))
+
+    def add_row(self, rule):
+        row = self.rules_table.rowCount()
+        self.rules_table.insertRow(row)
+        self.rules_table.setItem(row, self.PHRASE_COLUMN, QTableWidgetItem(rule.phrase))
+        sound_combo = QComboBox()
+        sound_combo.addItem("")
+        sound_combo.addItems(self.viewmodel.sound_service.sound_list())
+        sound_combo.setCurrentText(rule.sound)
+        self.rules_table.setCellWidget(row, self.SOUND_COLUMN, sound_combo)
+        self.rules_table.setItem(row, self.SPEECH_COLUMN, QTableWidgetItem(rule.speech))
+        highlight_item = QTableWidgetItem()
+        highlight_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
+        highlight_item.setCheckState(Qt.CheckState.Checked if rule.highlight else Qt.CheckState.Unchecked)
+        self.rules_table.setItem(row, self.HIGHLIGHT_COLUMN, highlight_item)
+
+    def load_rules(self):
+        """Заполняет таблицу текущими правилами"""
+        try:
+            self.rules_table.setRowCount(0)
+            for rule in self.trigger_service.rules():
+                self.add_row(rule)
+            self.logger.debug(f"Загружено {self.rules_table.rowCount()} триггеров в таблицу")
+        except Exception as e:
+            self.logger.error(f"Ошибка при загрузке триггеров: {str(e)}", exc_info=True)
+
+    def remove_selected(self):
+        for row in sorted({index.row() for index in self.rules_table.selectedIndexes()}, reverse=True):
+            self.rules_table.removeRow(row)
+
+    def save_rules(self):
+        """Сохраняет правила; изменения применяются сразу, без перезапуска мониторинга"""
+        try:
+            rules = []
+            for row in range(self.rules_table.rowCount()):
+                phrase_item = self.rules_table.item(row, self.PHRASE_COLUMN)
+                speech_item = self.rules_table.item(row, self.SPEECH_COLUMN)
+                phrase = phrase_item.text().strip() if phrase_item else ""
+                if not phrase:
+                    continue
+                rules.append(TriggerRule(
+                    phrase=phrase,
+                    sound=self.rules_table.cellWidget(row, self.SOUND_COLUMN).currentText(),
+                    speech=speech_item.text().strip() if speech_item else "",
+                    highlight=self.rules_table.item(row, self.HIGHLIGHT_COLUMN).checkState() == Qt.CheckState.Checked
+                ))
+            self.trigger_service.set_rules(rules)
+            self.load_rules()
+            QMessageBox.information(self, "Триггеры", f"Сохранено триггеров: {len(rules)}")
+        except Exception as e:
+            self.logger.error(f"Ошибка при сохранении триггеров: {str(e)}", exc_info=True)
+            self.error_handler.show_error_dialog(self, "Ошибка сохранения",
+                                                 "Не удалось сохранить триггеры", str(e))